@@ -0,0 +1,395 @@
+"""Вимірювання швидкодії гарячих шляхів нагадувань без вікна
+
+Приклади:
+    python benchmark.py --sizes 1000,10000,100000 --save baseline.json
+    python benchmark.py --compare baseline.json
+    python benchmark.py --sizes 1000000 --cases store,cleanup
+    python benchmark.py --ui
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from reminder_engine import remove_expired
+from reminder_import import collect_reminders, iter_bulk_events
+from reminder_months import MonthCache
+from reminder_scheduler import ReminderScheduler
+from reminder_storage import JsonStorage, STORAGE_MODES, open_storage
+from reminder_store import Reminder, ReminderStore
+
+DAY = 86400
+DISTRIBUTIONS = ('uniform', 'recent', 'hotspots')
+DEFAULT_SIZES = (1000, 10000, 100000)
+# Скільки рядків максимум розбирати у parse_events
+PARSE_LIMIT = 100000
+# Скільки нових нагадувань записує один прогін save
+SAVE_BATCH = 100
+
+
+def generate(size, distribution='recent', seed=0, now=None):
+    """Синтетичні нагадування від місяця тому до двох років уперед
+
+    uniform - рівномірно, recent - переважно найближчі тижні,
+    hotspots - усе зібрано в двадцяти завантажених днях.
+    """
+    rng = random.Random(seed)
+    now = int(now or time.time())
+    hot_days = [now + rng.randrange(-30, 730) * DAY for _ in range(20)]
+    reminders = []
+    for i in range(size):
+        if distribution == 'uniform':
+            ts = now - 30 * DAY + rng.randrange(760 * DAY)
+        elif distribution == 'recent':
+            ts = now - 3 * DAY + int(rng.expovariate(1 / (30 * DAY)))
+        elif distribution == 'hotspots':
+            ts = rng.choice(hot_days) + rng.randrange(DAY)
+        else:
+            raise ValueError(f'Невідомий розподіл: {distribution}')
+        reminders.append(Reminder(i + 1, f'Подія {i}', ts - ts % 60, now))
+    return reminders
+
+
+def bulk_lines(count, year, month, seed=0):
+    """Рядки формату "дд чч:хх подія" для масового додавання"""
+    rng = random.Random(seed)
+    return [
+        f'{rng.randint(1, 28)} {rng.randint(0, 23)}:{rng.randint(0, 59):02d} Подія {i}'
+        for i in range(count)
+    ]
+
+
+def percentile(sorted_values, fraction):
+    """Перцентиль методом найближчого рангу"""
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def measure(run, repeat, setup=None, teardown=None):
+    """Запускає run(setup()) repeat разів і ще раз під tracemalloc
+
+    Час підготовки і прибирання (teardown(результат run)) не враховується.
+    Повертає перцентилі в мілісекундах, пам'ять, що лишилась після
+    прогону, і пікову пам'ять у КіБ.
+    """
+    times = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        result = run(arg)
+        times.append((time.perf_counter() - start) * 1000)
+        if teardown:
+            teardown(result)
+
+    arg = setup() if setup else None
+    tracemalloc.start()
+    try:
+        result = run(arg)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        if teardown:
+            teardown(result)
+
+    times.sort()
+    return {
+        'repeat': repeat,
+        'p50': round(percentile(times, 0.5), 4),
+        'p90': round(percentile(times, 0.9), 4),
+        'p99': round(percentile(times, 0.99), 4),
+        'max': round(times[-1], 4),
+        'alloc_kib': current // 1024,
+        'peak_kib': peak // 1024,
+    }
+
+
+class FakeClock:
+    """Годинник для планувальника, що лише запам'ятовує заведений таймер"""
+    class Event:
+        def cancel(self):
+            pass
+
+    def schedule_once(self, callback, timeout):
+        return self.Event()
+
+
+def core_cases(reminders, workdir, now):
+    """Випадки, що працюють лише з модулями без Kivy: назва -> (setup, run[, teardown])"""
+    store = ReminderStore(reminders)
+    today = datetime.fromtimestamp(now).date()
+    busiest = max(store.between(now, None), key=lambda r: store.count_on(r.dt.date()), default=None)
+    busy_day = busiest.dt.date() if busiest else today
+    next_year = today.year + 1
+
+    clock_now = [now]
+    scheduler = ReminderScheduler(store, lambda due: None, FakeClock(), lambda: clock_now[0])
+
+    def start_scheduler(_):
+        clock_now[0] = now
+        scheduler.start()
+
+    def tick_setup():
+        start_scheduler(None)
+        clock_now[0] = now + 3600
+
+    months = [(today.year + (today.month + i - 1) // 12, (today.month + i - 1) % 12 + 1) for i in range(12)]
+    lines = bulk_lines(min(len(reminders), PARSE_LIMIT), next_year, 1)
+
+    def update_calendar(_):
+        # Рік сітки місяців і лічильник "сьогодні"
+        for year, month in months:
+            store.month_counts(year, month)
+        store.count_on(today)
+
+    month_cache = MonthCache()
+
+    def navigate(_):
+        # Рік вперед і назад з кешем моделей місяців, як кнопками навігації
+        for year, month in months + months[::-1]:
+            month_cache.get(store, year, month, today)
+            month_cache.prefetch(store, year, month, today)
+
+    cases = {
+        'store': (None, lambda _: ReminderStore(reminders)),
+        'update_calendar': (None, update_calendar),
+        'navigate': (month_cache.clear, navigate),
+        'day_popup': (None, lambda _: store.on_date(busy_day)),
+        'scheduler.start': (None, start_scheduler),
+        'scheduler.tick': (tick_setup, lambda _: scheduler._tick(0)),
+        'cleanup': (lambda: ReminderStore(reminders), lambda s: remove_expired(s, now + 1)),
+        'parse_events': (None, lambda _: collect_reminders(iter_bulk_events(lines, next_year, 1))),
+    }
+
+    seed = JsonStorage(os.path.join(workdir, 'seed.json'))
+    seed.compact(store)
+    for mode in STORAGE_MODES:
+        directory = os.path.join(workdir, mode)
+        os.makedirs(directory)
+        path = os.path.join(directory, 'reminders.json')
+        shutil.copy(seed.path, path)
+        # Перше відкриття виконує одноразову міграцію (для sqlite)
+        open_storage(mode, path).open_store()
+        cases[f'load[{mode}]'] = (None, lambda _, mode=mode, path=path: open_storage(mode, path).open_store())
+        cases[f'save[{mode}]'] = (
+            lambda mode=mode, path=path: _save_setup(mode, path),
+            lambda arg: _save(arg[0], arg[1], now),
+        )
+    return cases
+
+
+def _save_setup(mode, path):
+    storage = open_storage(mode, path)
+    store = storage.open_store()
+    store.drain_changes()
+    return storage, store
+
+
+def _save(storage, store, now):
+    # Додавання входить у замір: у режимі sqlite саме воно виконує INSERT
+    store.add_many(Reminder(None, f'Нове {i}', now + DAY + i * 60, now) for i in range(SAVE_BATCH))
+    storage.write(store.drain_changes(), store)
+
+
+def close_app(app):
+    """Зупиняє потоки застосунку, створеного без run(), нічого не записуючи"""
+    app.owner_lock.release()
+    app.engine.scheduler.stop()
+    if app.engine.writer is not None:
+        app.engine.writer.close()
+        app.engine.writer = None
+    app.notifier.close()
+
+
+def ui_cases(reminders, workdir, now, cleanup):
+    """Ті самі шляхи через віджети Kivy
+
+    Вікно не показується користувачу; на сервері без дисплея бекенд
+    задається змінною SDL_VIDEODRIVER (наприклад, offscreen) або xvfb-run.
+    Прибирання спільного застосунку додається до списку cleanup.
+    """
+    os.environ.setdefault('KIVY_NO_ARGS', '1')
+    os.environ.setdefault('KIVY_NO_CONSOLELOG', '1')
+    import calendar_app
+
+    seed = os.path.join(workdir, 'seed.json')
+    JsonStorage(seed).compact(ReminderStore(reminders))
+    directory = os.path.join(workdir, 'ui')
+    os.makedirs(directory)
+    os.chdir(directory)
+
+    def reset_files():
+        for name in os.listdir(directory):
+            if name != calendar_app.SUMMARY_PATH:
+                os.remove(os.path.join(directory, name))
+        shutil.copy(seed, 'reminders.json')
+
+    def first_frame(_):
+        # Швидкий старт: конструктор і build без завантаження нагадувань
+        calendar_app.FAST_START = True
+        app = calendar_app.CalendarApp()
+        app.build()
+        return app
+
+    def full_load(_):
+        calendar_app.FAST_START = False
+        return calendar_app.CalendarApp()
+
+    store = ReminderStore(reminders)
+    busy_day = max(
+        (r.dt.date() for r in store.between(now, None)), key=store.count_on,
+        default=datetime.fromtimestamp(now).date()
+    )
+
+    reset_files()
+    calendar_app.FAST_START = False
+    app = calendar_app.CalendarApp()
+    cleanup.append(lambda: close_app(app))
+    # Застосунки випадків відкривають ті самі файли в цьому ж процесі
+    app.owner_lock.release()
+    app.build()
+    # Підсумок для швидкого старту, як після звичайного закриття
+    app.save_summary(app.store)
+    months = [app.current_date, app.current_date.replace(day=1, year=app.current_date.year + 1)]
+
+    def switch_month():
+        months.reverse()
+        app.current_date = months[0]
+
+    def fresh_store():
+        reset_files()
+        app.engine.store = ReminderStore(reminders)
+
+    popup = calendar_app.BulkAddPopup(app)
+    next_year = datetime.fromtimestamp(now).year + 1
+    popup.year_spinner.text = str(next_year)
+    popup.events_input.text = '\n'.join(bulk_lines(min(len(reminders), PARSE_LIMIT), next_year, 1))
+
+    def reset_parsed():
+        popup._parsed = None
+
+    return {
+        'ui.first_frame': (None, first_frame, close_app),
+        'ui.load_reminders': (reset_files, full_load, close_app),
+        'ui.update_calendar': (switch_month, lambda _: app.update_calendar()),
+        'ui.cleanup_old_reminders': (fresh_store, lambda _: app.cleanup_old_reminders()),
+        'ui.parse_events': (reset_parsed, lambda _: popup.parse_events()),
+        'ui.day_popup': (None, lambda _: calendar_app.ReminderDetailPopup(busy_day, app)),
+    }
+
+
+def git_commit():
+    """Поточний коміт репозиторію або None"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(sizes, distributions, only=None, repeat=None, ui=False):
+    """Проганяє всі випадки і повертає результати для збереження"""
+    now = int(time.time())
+    results = []
+    cwd = os.getcwd()
+    for size in sizes:
+        for distribution in distributions:
+            reminders = generate(size, distribution, now=now)
+            workdir = tempfile.mkdtemp(prefix='calendar-bench-')
+            cleanup = []
+            try:
+                cases = core_cases(reminders, workdir, now)
+                if ui:
+                    cases.update(ui_cases(reminders, workdir, now, cleanup))
+                count = repeat or max(3, min(20, 100000 // size))
+                for name, (setup, run, *teardown) in cases.items():
+                    if only and not any(name.startswith(prefix) for prefix in only):
+                        continue
+                    row = {'case': name, 'size': size, 'distribution': distribution}
+                    row.update(measure(run, count, setup, *teardown))
+                    results.append(row)
+                    print_row(row)
+            finally:
+                for close in cleanup:
+                    close()
+                os.chdir(cwd)
+                shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'created': datetime.now().isoformat(timespec='seconds'),
+        },
+        'results': results,
+    }
+
+
+def print_row(row, note=''):
+    print(
+        f"{row['case']:<26} {row['size']:>8} {row['distribution']:<9}"
+        f" p50 {row['p50']:>10.3f}  p90 {row['p90']:>10.3f}  p99 {row['p99']:>10.3f} мс"
+        f"  alloc {row['alloc_kib']:>8} КіБ  peak {row['peak_kib']:>8} КіБ{note}",
+        flush=True,
+    )
+
+
+def compare(results, baseline, threshold):
+    """Порівнює медіани з базовими; повертає кількість регресій"""
+    base = {(r['case'], r['size'], r['distribution']): r for r in baseline['results']}
+    regressions = 0
+    print(f"\nПорівняння з {baseline['meta'].get('commit') or 'базовими результатами'}:")
+    for row in results['results']:
+        old = base.get((row['case'], row['size'], row['distribution']))
+        if old is None or not old['p50']:
+            continue
+        ratio = row['p50'] / old['p50']
+        regressed = ratio > 1 + threshold
+        regressions += regressed
+        print_row(row, f"  x{ratio:.2f}{'  РЕГРЕСІЯ' if regressed else ''}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Бенчмарк нагадувань без вікна')
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help='кількості нагадувань через кому (до 1000000)')
+    parser.add_argument('--distributions', default='recent',
+                        help=f"розподіли дат через кому: {', '.join(DISTRIBUTIONS)}")
+    parser.add_argument('--cases', help='префікси назв випадків через кому')
+    parser.add_argument('--repeat', type=int, help='кількість повторів кожного випадку')
+    parser.add_argument('--ui', action='store_true', help='також виміряти віджети Kivy')
+    parser.add_argument('--save', help='зберегти результати у файл JSON')
+    parser.add_argument('--compare', help='порівняти з раніше збереженими результатами')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='допустиме відносне уповільнення медіани (0.25 = 25%%)')
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    distributions = args.distributions.split(',')
+    only = args.cases.split(',') if args.cases else None
+    results = run_suite(sizes, distributions, only, args.repeat, args.ui)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,55 +1,122 @@
 from kivy.app import App
 from kivy.core.window import Window
 from kivy.uix.label import Label
+from kivy.uix.widget import Widget
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.button import Button
 from kivy.uix.gridlayout import GridLayout
-from kivy.uix.scrollview import ScrollView
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
 from kivy.uix.popup import Popup
 from kivy.uix.textinput import TextInput
 from kivy.uix.spinner import Spinner
 from kivy.clock import Clock
-from kivy.graphics import Color, RoundedRectangle, Line
-from datetime import datetime, timedelta
-import json
+from kivy.core.text import Label as CoreLabel
+from kivy.graphics import Color, Rectangle, Line
+from collections import deque
+from datetime import date, datetime
 import os
 import calendar
-import re
+import threading
+import time
+
+from reminder_archive import ReminderArchive, TieredView
+from reminder_engine import ReminderEngine
+from reminder_ical import export_ics
+from reminder_import import collect_reminders, import_batches, iter_bulk_events, iter_file_events
+from reminder_months import MonthCache
+from reminder_notify import NotificationDispatcher, batch_text, batch_title, sinks_from_spec
+from reminder_profile import count, profiler, timed
+from reminder_recurrence import Recurrence
+from reminder_store import Occurrence, Reminder, ReminderSummary, iter_frozen
+from reminder_storage import OwnerLock, open_storage, read_summary, write_summary
 
 Window.size = (600, 750)
 Window.clearcolor = (0.93, 0.95, 0.98, 1)  # Світло-голубий фон
 Window.title = "Календар Нагадувань"
 
+# 'journal' - дописування змін у журнал, 'json' - повний перезапис файлу
+STORAGE_MODE = os.environ.get('CALENDAR_STORAGE', 'journal')
+# Швидкий старт: перший кадр малюється з підсумку, а нагадування
+# завантажуються у фоновому потоці; '0' вимикає
+FAST_START = os.environ.get('CALENDAR_FAST_START', '1') != '0'
+SUMMARY_PATH = 'reminders.summary.json'
+# Тека з архівом нагадувань, що спрацювали чи прострочились
+ARCHIVE_PATH = 'reminders.archive'
+# Канали сповіщень через кому: toast, desktop, log=файл, webhook=url, smtp=хост:порт
+NOTIFY_SINKS = os.environ.get('CALENDAR_NOTIFY', 'toast')
+
 class DayButton(Button):
-    """Кнопка для дня календаря з індикатором подій"""
-    def __init__(self, day, is_today=False, is_other_month=False, has_reminders=False, **kwargs):
+    """Кнопка для дня календаря з індикатором подій
+
+    Кнопки сітки створюються один раз і перевикористовуються: set_day
+    лише перепризначає день, а стиль оновлює тільки якщо стан змінився.
+    """
+    # Відтінки теплової карти: від одного нагадування до HEAT_LEVELS і більше
+    HEAT_LEVELS = 4
+    HEAT_LIGHT = (0.5, 0.7, 0.9)
+    HEAT_DARK = (0.2, 0.4, 0.7)
+    
+    def __init__(self, day=0, is_today=False, is_other_month=False, reminder_count=0, **kwargs):
         super(DayButton, self).__init__(**kwargs)
-        self.day = day
-        self.is_today = is_today
-        self.is_other_month = is_other_month
-        self.has_reminders = has_reminders
+        count('widgets_created')
         self.size_hint = (None, None)
         self.size = (70, 70)
+        self.date = None
+        self._state = None
         
-        if day > 0:
-            self.text = str(day)
-        else:
-            self.text = ''
-            self.disabled = True
-        
+        self.set_day(day, None, is_today, is_other_month, reminder_count)
+    
+    @property
+    def has_reminders(self):
+        return self.reminder_count > 0
+    
+    @classmethod
+    def heat_color(cls, reminder_count):
+        """Колір дня з reminder_count нагадуваннями (без нагадувань - None)"""
+        if reminder_count <= 0:
+            return None
+        t = (min(reminder_count, cls.HEAT_LEVELS) - 1) / (cls.HEAT_LEVELS - 1)
+        return tuple(
+            light + (dark - light) * t for light, dark in zip(cls.HEAT_LIGHT, cls.HEAT_DARK)
+        ) + (1,)
+    
+    def set_day(self, day, date_obj=None, is_today=False, is_other_month=False, reminder_count=0, is_selected=False):
+        """Прив'язує кнопку до дня; повертає True, якщо стиль довелося змінити"""
+        self.date = date_obj
+        state = (day, is_today, is_other_month, min(reminder_count, self.HEAT_LEVELS), is_selected)
+        if state == self._state:
+            return False
+        
+        self._state = state
+        self.day, self.is_today, self.is_other_month, self.reminder_count, self.is_selected = state
+        self.text = str(day) if day > 0 else ''
+        self.disabled = day <= 0
         self.update_style()
+        return True
     
     def update_style(self):
         """Оновлює стиль кнопки"""
-        if self.is_other_month or self.day <= 0:
+        self.bold = False
+        if self.day <= 0:
+            # Порожня клітинка поза місяцем
+            self.background_color = (0, 0, 0, 0)
+            self.color = (0, 0, 0, 0)
+        elif self.is_other_month:
             self.background_color = (0.95, 0.95, 0.95, 0.3)
             self.color = (0.7, 0.7, 0.7, 0.5)
+        elif self.is_selected:
+            # День, до якого перейшли з пошуку
+            self.background_color = (0.95, 0.65, 0.3, 1)
+            self.color = (1, 1, 1, 1)
+            self.bold = True
         elif self.is_today:
             self.background_color = (0.4, 0.6, 0.85, 1) 
             self.color = (1, 1, 1, 1)
             self.bold = True
         elif self.has_reminders:
-            self.background_color = (0.5, 0.7, 0.9, 1) 
+            self.background_color = self.heat_color(self.reminder_count)
             self.color = (1, 1, 1, 1)
         else:
             self.background_color = (1, 1, 1, 1)
@@ -57,6 +124,192 @@ class DayButton(Button):
         
         self.font_size = 18
 
+class MonthOverview(Widget):
+    """Мініатюри кількох місяців, намальовані прямо на canvas
+
+    Кожен день - один прямокутник кольору теплової карти, тож рік - це
+    близько 400 інструкцій замість 400 кнопок. Кількості беруться з
+    month_counts сховища. Дотик до місяця викликає on_month(рік, місяць).
+    """
+    COLS = 3
+    TITLE_HEIGHT = 24
+    PADDING = 6
+    EMPTY_COLOR = (1, 1, 1, 1)
+    TODAY_COLOR = (0.95, 0.65, 0.3, 1)
+    MONTHS = ['Січень', 'Лютий', 'Березень', 'Квітень', 'Травень', 'Червень',
+              'Липень', 'Серпень', 'Вересень', 'Жовтень', 'Листопад', 'Грудень']
+    
+    def __init__(self, source, on_month=None, **kwargs):
+        super(MonthOverview, self).__init__(**kwargs)
+        self.source = source
+        self.on_month = on_month
+        self.months = []
+        # Області місяців для дотиків: (x, y, ширина, висота, рік, місяць)
+        self._areas = []
+        # Текстури назв місяців, щоб не рендерити текст при кожному перемальовуванні
+        self._titles = {}
+        self._redraw = Clock.create_trigger(lambda dt: self.redraw())
+        self.bind(pos=self._redraw, size=self._redraw)
+    
+    def show(self, months):
+        """Показує місяці - список пар (рік, місяць)"""
+        self.months = months
+        self.redraw()
+    
+    def _title(self, year, month):
+        texture = self._titles.get((year, month))
+        if texture is None:
+            label = CoreLabel(text=f'{self.MONTHS[month - 1]} {year}', font_size=14, bold=True)
+            label.refresh()
+            texture = self._titles[(year, month)] = label.texture
+        return texture
+    
+    def redraw(self):
+        """Малює всі місяці заново"""
+        self.canvas.clear()
+        self._areas = []
+        if not self.months or self.width <= 1 or self.height <= 1:
+            return
+        
+        rows = (len(self.months) + self.COLS - 1) // self.COLS
+        area_w = self.width / self.COLS
+        area_h = self.height / rows
+        # Сторона клітинки дня: 7 стовпців і 6 рядків у межах області місяця
+        step = min((area_w - 2 * self.PADDING) / 7, (area_h - self.TITLE_HEIGHT - self.PADDING) / 6)
+        today = datetime.now().date()
+        
+        with self.canvas:
+            for i, (year, month) in enumerate(self.months):
+                x = self.x + (i % self.COLS) * area_w
+                top = self.top - (i // self.COLS) * area_h
+                self._areas.append((x, top - area_h, area_w, area_h, year, month))
+                
+                texture = self._title(year, month)
+                Color(0.3, 0.5, 0.7, 1)
+                Rectangle(
+                    texture=texture,
+                    size=texture.size,
+                    pos=(x + (area_w - texture.width) / 2, top - self.TITLE_HEIGHT + (self.TITLE_HEIGHT - texture.height) / 2)
+                )
+                
+                left = x + (area_w - 7 * step) / 2
+                grid_top = top - self.TITLE_HEIGHT
+                first_weekday, days_in_month = calendar.monthrange(year, month)
+                counts = self.source.month_counts(year, month)
+                color = None
+                for day in range(1, days_in_month + 1):
+                    row, col = divmod(first_weekday + day - 1, 7)
+                    day_color = DayButton.heat_color(counts[day]) or self.EMPTY_COLOR
+                    # Color додається лише при зміні кольору
+                    if day_color != color:
+                        color = day_color
+                        Color(*color)
+                    Rectangle(pos=(left + col * step, grid_top - (row + 1) * step), size=(step - 2, step - 2))
+                
+                if today.year == year and today.month == month:
+                    row, col = divmod(first_weekday + today.day - 1, 7)
+                    Color(*self.TODAY_COLOR)
+                    Line(rectangle=(left + col * step, grid_top - (row + 1) * step, step - 2, step - 2), width=1.5)
+    
+    def on_touch_down(self, touch):
+        if self.collide_point(*touch.pos):
+            for x, y, w, h, year, month in self._areas:
+                if x <= touch.x < x + w and y <= touch.y < y + h:
+                    if self.on_month is not None:
+                        self.on_month(year, month)
+                    return True
+        return super(MonthOverview, self).on_touch_down(touch)
+
+class OverviewPopup(Popup):
+    """Огляд року (12 місяців) або трьох місяців з переходом до обраного"""
+    def __init__(self, app_instance, span=12, **kwargs):
+        super(OverviewPopup, self).__init__(**kwargs)
+        self.app_instance = app_instance
+        self.span = span
+        self.size_hint = (0.95, 0.9)
+        
+        current = app_instance.current_date
+        if span == 12:
+            self.year, self.month = current.year, 1
+        else:
+            # Поточний місяць посередині
+            self.year, self.month = self._shift(current.year, current.month, -(span // 2))
+        
+        main_layout = BoxLayout(orientation='vertical', spacing=10, padding=10)
+        
+        nav_layout = BoxLayout(orientation='horizontal', size_hint_y=None, height=50, spacing=10)
+        prev_btn = Button(
+            text='Попередній',
+            size_hint_x=0.3,
+            background_color=(0.5, 0.65, 0.8, 1),
+            font_size=14
+        )
+        prev_btn.bind(on_press=lambda x: self.move(-1))
+        next_btn = Button(
+            text='Наступний',
+            size_hint_x=0.3,
+            background_color=(0.5, 0.65, 0.8, 1),
+            font_size=14
+        )
+        next_btn.bind(on_press=lambda x: self.move(1))
+        self.period_label = Label(
+            text='',
+            font_size=18,
+            color=(0.3, 0.4, 0.5, 1),
+            bold=True
+        )
+        nav_layout.add_widget(prev_btn)
+        nav_layout.add_widget(self.period_label)
+        nav_layout.add_widget(next_btn)
+        
+        self.overview = MonthOverview(app_instance.calendar_source, on_month=self.select)
+        
+        close_btn = Button(
+            text='Закрити',
+            size_hint_y=None,
+            height=50,
+            background_color=(0.6, 0.7, 0.8, 1),
+            font_size=16
+        )
+        close_btn.bind(on_press=self.dismiss)
+        
+        main_layout.add_widget(nav_layout)
+        main_layout.add_widget(self.overview)
+        main_layout.add_widget(close_btn)
+        self.content = main_layout
+        
+        self.update()
+    
+    @staticmethod
+    def _shift(year, month, delta):
+        index = year * 12 + month - 1 + delta
+        return index // 12, index % 12 + 1
+    
+    def update(self):
+        """Перемальовує поточний проміжок місяців"""
+        months = [self._shift(self.year, self.month, i) for i in range(self.span)]
+        self.overview.show(months)
+        if self.span == 12:
+            self.title = 'Огляд року'
+            self.period_label.text = str(self.year)
+        else:
+            (first_year, first_month), (last_year, last_month) = months[0], months[-1]
+            names = MonthOverview.MONTHS
+            self.title = f'Огляд {self.span} місяців'
+            self.period_label.text = (
+                f'{names[first_month - 1]} {first_year} - {names[last_month - 1]} {last_year}'
+            )
+    
+    def move(self, direction):
+        """Зсуває огляд на весь проміжок уперед чи назад"""
+        self.year, self.month = self._shift(self.year, self.month, direction * self.span)
+        self.update()
+    
+    def select(self, year, month):
+        """Закриває огляд і показує обраний місяць у календарі"""
+        self.dismiss()
+        self.app_instance.show_month(year, month)
+
 class BulkAddPopup(Popup):
     """Вікно для масового додавання подій"""
     def __init__(self, app_instance, **kwargs):
@@ -110,6 +363,35 @@ class BulkAddPopup(Popup):
         )
         year_layout.add_widget(self.year_spinner)
         
+        file_layout = BoxLayout(orientation='horizontal', size_hint_y=None, height=40, spacing=10)
+        file_layout.add_widget(Label(text='Файл:', size_hint_x=0.3, color=(0.3, 0.4, 0.5, 1)))
+        
+        self.file_input = TextInput(
+            hint_text='шлях до .ics, .csv (дата,час,подія) або .txt (дд чч подія)',
+            multiline=False,
+            size_hint_x=0.4,
+            font_size=12
+        )
+        file_layout.add_widget(self.file_input)
+        
+        import_btn = Button(
+            text='Імпорт',
+            size_hint_x=0.2,
+            background_color=(0.5, 0.65, 0.8, 1),
+            font_size=14
+        )
+        import_btn.bind(on_press=self.import_file)
+        file_layout.add_widget(import_btn)
+        
+        export_btn = Button(
+            text='Експорт',
+            size_hint_x=0.2,
+            background_color=(0.5, 0.65, 0.8, 1),
+            font_size=14
+        )
+        export_btn.bind(on_press=self.export_file)
+        file_layout.add_widget(export_btn)
+        
         self.result_label = Label(
             text='Введіть події вище',
             font_size=12,
@@ -150,73 +432,33 @@ class BulkAddPopup(Popup):
         main_layout.add_widget(month_layout)
         main_layout.add_widget(year_layout)
         main_layout.add_widget(self.events_input)
+        main_layout.add_widget(file_layout)
         main_layout.add_widget(self.result_label)
         main_layout.add_widget(btn_layout)
         
         self.content = main_layout
+        
+        # Результат останнього розбору, щоб "Додати всі" не розбирав текст повторно
+        self._parsed = None
+        self._importing = False
+    
+    def selected_month(self):
+        """Повертає (рік, місяць), вибрані у спінерах"""
+        months_ua = ['Січень', 'Лютий', 'Березень', 'Квітень', 'Травень', 'Червень',
+                     'Липень', 'Серпень', 'Вересень', 'Жовтень', 'Листопад', 'Грудень']
+        return int(self.year_spinner.text), months_ua.index(self.month_spinner.text) + 1
     
     def parse_events(self):
         """Парсить введені події"""
         text = self.events_input.text.strip()
-        if not text:
-            return []
-        
-        lines = text.split('\n')
-        events = []
+        year, month = self.selected_month()
         
-
-        months_ua = ['Січень', 'Лютий', 'Березень', 'Квітень', 'Травень', 'Червень',
-                     'Липень', 'Серпень', 'Вересень', 'Жовтень', 'Листопад', 'Грудень']
-        month = months_ua.index(self.month_spinner.text) + 1
-        year = int(self.year_spinner.text)
-        
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-            
-
-            match = re.match(r'^(\d{1,2})\s+(\d{1,2}):?(\d{0,2})\s+(.+)$', line)
-            
-            if match:
-                day = int(match.group(1))
-                hour = int(match.group(2))
-                minute = int(match.group(3)) if match.group(3) else 0
-                event_text = match.group(4).strip()
-                
-      
-                try:
-            
-                    date_obj = datetime(year, month, day, hour, minute)
-                    
-             
-                    if date_obj > datetime.now():
-                        events.append({
-                            'day': day,
-                            'hour': hour,
-                            'minute': minute,
-                            'text': event_text,
-                            'datetime': date_obj
-                        })
-                    else:
-                        events.append({
-                            'day': day,
-                            'hour': hour,
-                            'minute': minute,
-                            'text': event_text,
-                            'error': 'Минула дата'
-                        })
-                except ValueError as e:
-                    events.append({
-                        'line': line,
-                        'error': f'Некоректна дата: {str(e)}'
-                    })
-            else:
-                events.append({
-                    'line': line,
-                    'error': 'Неправильний формат'
-                })
+        key = (text, year, month)
+        if self._parsed is not None and self._parsed[0] == key:
+            return self._parsed[1]
         
+        events = list(iter_bulk_events(text.splitlines(), year, month)) if text else []
+        self._parsed = (key, events)
         return events
     
     def preview_events(self, instance):
@@ -253,27 +495,101 @@ class BulkAddPopup(Popup):
             return
         
 
-        added_count = 0
-        for event in valid_events:
-            reminder = {
-                'id': len(self.app_instance.reminders) + 1 + added_count,
-                'title': event['text'],
-                'date': event['datetime'].strftime('%d.%m.%Y'),
-                'time': f"{event['hour']:02d}:{event['minute']:02d}",
-                'datetime': event['datetime'].isoformat(),
-                'created': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            }
-            self.app_instance.reminders.append(reminder)
-            added_count += 1
-
-        self.app_instance.reminders.sort(key=lambda x: x.get('datetime', ''))
+        reminders = collect_reminders(valid_events)[0]
+        self.app_instance.import_reminders(reminders)
+        
+        self.show_message('Успіх', f'Додано {len(reminders)} подій!')
+        self.dismiss()
+    
+    def import_file(self, instance):
+        """Імпортує події з файлу у фоновому потоці"""
+        path = self.file_input.text.strip()
+        if not path or not os.path.isfile(path):
+            self.show_message('Помилка', 'Файл не знайдено!')
+            return
+        if self._importing:
+            return
+        
+        self._importing = True
+        self.result_label.text = 'Імпорт...'
+        year, month = self.selected_month()
+        threading.Thread(target=self._import_worker, args=(path, year, month), daemon=True).start()
+    
+    def _import_worker(self, path, year, month):
+        """Розбирає файл поза потоком інтерфейсу
 
-        self.app_instance.save_reminders()
-        self.app_instance.update_calendar()
+        Пачки нагадувань лише накопичуються, а в сховище потрапляють одним
+        комітом після того, як файл прочитано повністю: помилка читання
+        посередині не лишає частини імпорту.
+        """
+        staged = []
+        try:
+            result = import_batches(iter_file_events(path, year, month), staged.extend,
+                                    progress=self._report_progress)
+        except (OSError, UnicodeDecodeError) as e:
+            Clock.schedule_once(lambda dt, error=e: self._import_failed(error))
+            return
+        Clock.schedule_once(lambda dt: self._import_done(staged, *result))
+    
+    def _report_progress(self, processed):
+        """Показує кількість оброблених рядків"""
+        Clock.schedule_once(lambda dt: setattr(self.result_label, 'text', f'Оброблено рядків: {processed}'))
+    
+    def _import_failed(self, error):
+        """Повідомляє про помилку читання файлу"""
+        self._importing = False
+        self.result_label.text = 'Помилка імпорту'
+        self.show_message('Помилка', f'Не вдалося прочитати файл:\n{error}')
+    
+    def _import_done(self, reminders, added, errors, error_count, line_count):
+        """Додає прочитані нагадування одним комітом і показує підсумок"""
+        self._importing = False
+        if reminders:
+            self.app_instance.import_reminders(reminders)
+        self.result_label.text = f'Рядків: {line_count}, коректних: {added}, помилок: {error_count}'
+        
+        if not added:
+            self.show_message('Помилка', 'У файлі немає коректних подій!')
+            return
         
-        self.show_message('Успіх', f'Додано {added_count} подій!')
+        self.show_message('Успіх', f'Додано {added} подій!\nПомилок: {error_count}')
         self.dismiss()
     
+    def export_file(self, instance):
+        """Експортує всі нагадування у файл .ics у фоновому потоці"""
+        path = self.file_input.text.strip()
+        if not path.lower().endswith('.ics'):
+            self.show_message('Помилка', 'Вкажіть шлях до файлу .ics!')
+            return
+        if self._importing:
+            return
+        
+        self._importing = True
+        self.result_label.text = 'Експорт...'
+        # Незмінний знімок знімається тут, а записи з нього читає і
+        # перетворює вже потік експорту, не тримаючи їх усіх у пам'яті.
+        # sqlite читає зафіксовані рядки, тож відкладені зміни фіксуються спершу
+        self.app_instance.engine.flush()
+        frozen = self.app_instance.store.freeze()
+        threading.Thread(target=self._export_worker, args=(path, frozen), daemon=True).start()
+    
+    def _export_worker(self, path, frozen):
+        try:
+            exported = export_ics(iter_frozen(frozen), path)
+        except OSError as e:
+            Clock.schedule_once(lambda dt, error=e: self._export_done(None, error))
+            return
+        Clock.schedule_once(lambda dt: self._export_done(exported))
+    
+    def _export_done(self, exported, error=None):
+        self._importing = False
+        if error is not None:
+            self.result_label.text = 'Помилка експорту'
+            self.show_message('Помилка', f'Не вдалося записати файл:\n{error}')
+            return
+        self.result_label.text = f'Експортовано: {exported}'
+        self.show_message('Успіх', f'Експортовано {exported} нагадувань!')
+    
     def show_message(self, title, message):
         """Показує повідомлення"""
         popup_layout = BoxLayout(orientation='vertical', spacing=15, padding=20)
@@ -303,12 +619,94 @@ class BulkAddPopup(Popup):
         popup_layout.add_widget(ok_btn)
         popup.open()
 
+class ReminderRow(RecycleDataViewBehavior, BoxLayout):
+    """Рядок списку нагадувань дня; RecycleView перевикористовує його віджети"""
+    def __init__(self, **kwargs):
+        super(ReminderRow, self).__init__(orientation='horizontal', padding=10, spacing=10, **kwargs)
+        count('widgets_created')
+        self.reminder = None
+        self.popup = None
+        
+        self.info_layout = BoxLayout(orientation='vertical', size_hint_x=0.75)
+        
+        self.title_label = Label(
+            font_size=16,
+            text_size=(400, None),
+            halign='left',
+            valign='top',
+            color=(0.2, 0.3, 0.4, 1)
+        )
+        
+        self.time_label = Label(
+            font_size=14,
+            text_size=(400, None),
+            halign='left',
+            valign='bottom',
+            color=(0.4, 0.5, 0.6, 1)
+        )
+        
+        self.info_layout.add_widget(self.title_label)
+        self.info_layout.add_widget(self.time_label)
+        
+        self.delete_btn = Button(
+            text='Видалити',
+            size_hint_x=0.25,
+            font_size=14,
+            background_color=(0.7, 0.75, 0.8, 1)
+        )
+        self.delete_btn.bind(on_press=lambda x: self.popup.delete_reminder(self.reminder))
+        
+        # Додається лише в рядках повторень серії
+        self.series_btn = Button(
+            text='Усю серію',
+            size_hint_x=0.25,
+            font_size=14,
+            background_color=(0.7, 0.75, 0.8, 1)
+        )
+        self.series_btn.bind(on_press=lambda x: self.popup.delete_series(self.reminder))
+        
+        self.add_widget(self.info_layout)
+        self.add_widget(self.delete_btn)
+    
+    def refresh_view_attrs(self, rv, index, data):
+        """Заповнює рядок даними нагадування"""
+        self.popup = rv.popup
+        reminder = data['reminder']
+        self.reminder = reminder
+        # Архівні нагадування вже минули - їх лише показуємо
+        archived = data.get('archived', False)
+        is_occurrence = isinstance(reminder, Occurrence) and not archived
+        
+        self.title_label.text = reminder.title
+        self.time_label.text = reminder.time + (' (повторюється)' if is_occurrence else '')
+        if archived:
+            self.time_label.text += ' (минуло)'
+        self.delete_btn.disabled = archived
+        
+        if is_occurrence and self.series_btn.parent is None:
+            self.info_layout.size_hint_x = 0.5
+            self.add_widget(self.series_btn)
+        elif not is_occurrence and self.series_btn.parent is not None:
+            self.info_layout.size_hint_x = 0.75
+            self.remove_widget(self.series_btn)
+        return super(ReminderRow, self).refresh_view_attrs(rv, index, data)
+
 class ReminderDetailPopup(Popup):
     """Спливаюче вікно для перегляду та додавання нагадувань на обраний день"""
+    # Назва у спінері -> (частота, крок); крок None береться з поля N
+    REPEAT_OPTIONS = {
+        'Без повтору': None,
+        'Щодня': ('daily', 1),
+        'Щотижня': ('weekly', 1),
+        'Щомісяця': ('monthly', 1),
+        'Кожні N днів': ('daily', None),
+    }
+    
     def __init__(self, date_obj, app_instance, **kwargs):
         super(ReminderDetailPopup, self).__init__(**kwargs)
         self.date_obj = date_obj
         self.app_instance = app_instance
+        self._message_popup = None
   
         months_ua = ['Січня', 'Лютого', 'Березня', 'Квітня', 'Травня', 'Червня',
                      'Липня', 'Серпня', 'Вересня', 'Жовтня', 'Листопада', 'Грудня']
@@ -320,7 +718,7 @@ class ReminderDetailPopup(Popup):
         
         main_layout = BoxLayout(orientation='vertical', spacing=15, padding=15)
 
-        add_section = BoxLayout(orientation='vertical', size_hint_y=None, height=180, spacing=10)
+        add_section = BoxLayout(orientation='vertical', size_hint_y=None, height=230, spacing=10)
 
         add_title = Label(
             text='Додати нове нагадування',
@@ -362,6 +760,33 @@ class ReminderDetailPopup(Popup):
         )
         
         time_layout.add_widget(self.minute_spinner)
+        
+        repeat_layout = BoxLayout(orientation='horizontal', size_hint_y=None, height=40, spacing=10)
+        repeat_layout.add_widget(Label(text='Повтор:', size_hint_x=0.2, color=(0.3, 0.3, 0.3, 1)))
+        
+        self.repeat_spinner = Spinner(
+            text='Без повтору',
+            values=list(self.REPEAT_OPTIONS),
+            size_hint_x=0.35
+        )
+        repeat_layout.add_widget(self.repeat_spinner)
+        
+        self.interval_input = TextInput(
+            hint_text='N',
+            input_filter='int',
+            multiline=False,
+            size_hint_x=0.15,
+            font_size=14
+        )
+        repeat_layout.add_widget(self.interval_input)
+        
+        self.repeat_end_input = TextInput(
+            hint_text='разів або дд.мм.рррр',
+            multiline=False,
+            size_hint_x=0.3,
+            font_size=12
+        )
+        repeat_layout.add_widget(self.repeat_end_input)
 
         add_btn = Button(
             text='Додати',
@@ -375,6 +800,7 @@ class ReminderDetailPopup(Popup):
         add_section.add_widget(add_title)
         add_section.add_widget(text_layout)
         add_section.add_widget(time_layout)
+        add_section.add_widget(repeat_layout)
         add_section.add_widget(add_btn)
         
 
@@ -396,11 +822,32 @@ class ReminderDetailPopup(Popup):
         )
         
 
-        self.reminders_layout = BoxLayout(orientation='vertical', size_hint_y=None, spacing=30)
-        self.reminders_layout.bind(minimum_height=self.reminders_layout.setter('height'),)
+        # Віджети створюються лише для видимих рядків
+        self.reminders_view = RecycleView()
+        self.reminders_view.popup = self
+        rows_layout = RecycleBoxLayout(
+            orientation='vertical',
+            size_hint_y=None,
+            default_size=(None, 70),
+            default_size_hint=(1, None),
+            spacing=30
+        )
+        rows_layout.bind(minimum_height=rows_layout.setter('height'))
+        self.reminders_view.add_widget(rows_layout)
+        # viewclass задається після layout manager, інакше RecycleView його відкидає
+        self.reminders_view.viewclass = ReminderRow
+        
+        self.empty_label = Label(
+            text='Немає нагадувань на цей день',
+            font_size=14,
+            color=(0.5, 0.6, 0.7, 1),
+            size_hint_y=None,
+            padding=10,
+            height=40
+        )
         
-        scroll = ScrollView()
-        scroll.add_widget(self.reminders_layout)
+        # Містить або список, або напис про його відсутність
+        self.list_box = BoxLayout(orientation='vertical')
 
         close_btn = Button(
             text='Закрити',
@@ -414,7 +861,7 @@ class ReminderDetailPopup(Popup):
         main_layout.add_widget(add_section)
         main_layout.add_widget(divider)
         main_layout.add_widget(list_title)
-        main_layout.add_widget(scroll)
+        main_layout.add_widget(self.list_box)
         main_layout.add_widget(close_btn)
         
         self.content = main_layout
@@ -442,142 +889,376 @@ class ReminderDetailPopup(Popup):
             self.show_message('Помилка', 'Час нагадування має бути в майбутньому!')
             return
         
+        try:
+            repeat = self.parse_repeat()
+        except ValueError as e:
+            self.show_message('Помилка', str(e))
+            return
   
-        reminder = {
-            'id': len(self.app_instance.reminders) + 1,
-            'title': text,
-            'date': self.date_obj.strftime('%d.%m.%Y'),
-            'time': f'{hour:02d}:{minute:02d}',
-            'datetime': reminder_datetime.isoformat(),
-            'created': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        }
-        
-        self.app_instance.reminders.append(reminder)
-        self.app_instance.save_reminders()
+        reminder = Reminder(
+            self.app_instance.store.allocate_id(),
+            text,
+            int(reminder_datetime.timestamp()),
+            int(time.time()),
+            repeat
+        )
+        
+        self.app_instance.engine.add(reminder)
       
-        self.load_day_reminders()
-        self.app_instance.update_calendar()
+        # Нове нагадування вставляється на своє місце за часом без перечитування дня
+        item = Occurrence(reminder, reminder.ts) if repeat is not None else reminder
+        data = self.reminders_view.data
+        index = next((i for i, row in enumerate(data) if row['reminder'].ts > item.ts), len(data))
+        data.insert(index, {'reminder': item})
+        self.update_empty_state()
     
         self.reminder_input.text = ''
         
         self.show_message('Успіх', 'Нагадування додано!')
     
+    def parse_repeat(self):
+        """Створює правило повторення з полів форми; ValueError з текстом помилки"""
+        option = self.REPEAT_OPTIONS[self.repeat_spinner.text]
+        if option is None:
+            return None
+        
+        freq, interval = option
+        if interval is None:
+            if not self.interval_input.text.strip():
+                raise ValueError('Вкажіть кількість днів N!')
+            interval = int(self.interval_input.text)
+            if interval < 1:
+                raise ValueError('N має бути більше нуля!')
+        
+        repeat_count = until = None
+        end_text = self.repeat_end_input.text.strip()
+        if end_text.isdigit():
+            repeat_count = int(end_text)
+            if repeat_count < 1:
+                raise ValueError('Кількість повторень має бути більше нуля!')
+        elif end_text:
+            try:
+                end_date = datetime.strptime(end_text, '%d.%m.%Y')
+            except ValueError:
+                raise ValueError('Кінець повтору: число або дата дд.мм.рррр')
+            # Дата завершення включається повністю
+            until = int(end_date.replace(hour=23, minute=59, second=59).timestamp())
+        
+        return Recurrence(freq, interval, repeat_count, until)
+    
+    @timed('load_day_reminders')
     def load_day_reminders(self):
         """Завантажує нагадування для обраного дня"""
-        self.reminders_layout.clear_widgets()
-        
-        date_str = self.date_obj.strftime('%d.%m.%Y')
-        day_reminders = [r for r in self.app_instance.reminders if r.get('date') == date_str]
-        
-        if not day_reminders:
-            empty_label = Label(
-                text='Немає нагадувань на цей день',
-                font_size=14,
-                color=(0.5, 0.6, 0.7, 1),
+        rows = [{'reminder': reminder} for reminder in self.app_instance.store.on_date(self.date_obj)]
+        archived = self.app_instance.archive.on_date(self.date_obj)
+        if archived:
+            rows.extend({'reminder': reminder, 'archived': True} for reminder in archived)
+            rows.sort(key=lambda row: row['reminder'].ts)
+        self.reminders_view.data = rows
+        self.update_empty_state()
+    
+    def update_empty_state(self):
+        """Показує список або напис, що нагадувань немає"""
+        widget = self.reminders_view if self.reminders_view.data else self.empty_label
+        if widget.parent is None:
+            self.list_box.clear_widgets()
+            self.list_box.add_widget(widget)
+    
+    def delete_reminder(self, reminder):
+        """Видаляє нагадування; для серії - лише це повторення"""
+        self.app_instance.engine.remove(reminder)
+        data = self.reminders_view.data
+        for i, row in enumerate(data):
+            if row['reminder'] is reminder:
+                del data[i]
+                break
+        self.update_empty_state()
+        self.show_message('Видалено', 'Нагадування видалено!')
+    
+    def delete_series(self, reminder):
+        """Видаляє всю серію повторюваних нагадувань"""
+        self.app_instance.engine.remove_series(reminder.id)
+        self.reminders_view.data = [
+            row for row in self.reminders_view.data
+            if row['reminder'].id != reminder.id or row.get('archived')
+        ]
+        self.update_empty_state()
+        self.show_message('Видалено', 'Серію нагадувань видалено!')
+    
+    def show_message(self, title, message):
+        """Показує коротке повідомлення; вікно створюється один раз на попап"""
+        if self._message_popup is None:
+            popup_layout = BoxLayout(orientation='vertical', spacing=15, padding=20)
+            
+            self._message_label = Label(
+                font_size=16,
+                text_size=(300, None),
+                halign='center'
+            )
+            popup_layout.add_widget(self._message_label)
+            
+            ok_btn = Button(
+                text='OK',
                 size_hint_y=None,
-                padding=10,
-                height=40
+                height=45,
+                background_color=(0.4, 0.6, 0.85, 1)
             )
-            self.reminders_layout.add_widget(empty_label)
-        else:
-            day_reminders.sort(key=lambda x: x.get('time', '00:00'))
             
-            for reminder in day_reminders:
-                reminder_item = self.create_reminder_item(reminder)
-                self.reminders_layout.add_widget(reminder_item)
-    
-    def create_reminder_item(self, reminder):
-        """Створює елемент списку нагадування"""
-        item_layout = BoxLayout(
-            orientation='horizontal',
-            size_hint_y=None,
-            height=70,
-            padding=10,
-            spacing=10
-        )
+            self._message_popup = Popup(
+                content=popup_layout,
+                size_hint=(0.7, 0.4)
+            )
+            
+            ok_btn.bind(on_press=self._message_popup.dismiss)
+            popup_layout.add_widget(ok_btn)
         
+        self._message_popup.title = title
+        self._message_label.text = message
+        if self._message_popup.parent is None:
+            self._message_popup.open()
+
+class ToastQueue(Button):
+    """Немодальне сповіщення внизу вікна з чергою групових сповіщень
+
+    Показується одне сповіщення за раз; натискання чи SHOW_SECONDS
+    секунд ховають його і показують наступне. У черзі не більше
+    MAX_QUEUED груп - найстаріші відкидаються.
+    """
+    SHOW_SECONDS = 8
+    MAX_QUEUED = 20
     
-        info_layout = BoxLayout(orientation='vertical', size_hint_x=0.75)
-        
-        title_label = Label(
-            text=reminder['title'],
-            font_size=16,
-            text_size=(400, None),
-            halign='left',
-            valign='top',
-            color=(0.2, 0.3, 0.4, 1)
+    def __init__(self, **kwargs):
+        super(ToastQueue, self).__init__(
+            size_hint=(0.9, None),
+            height=110,
+            pos_hint={'center_x': 0.5, 'y': 0.02},
+            font_size=15,
+            halign='center',
+            valign='middle',
+            color=(1, 1, 1, 1),
+            background_color=(0.3, 0.5, 0.7, 1),
+            **kwargs
         )
-        
-        time_label = Label(
-            text=f"{reminder.get('time', '00:00')}",
+        self.queue = deque(maxlen=self.MAX_QUEUED)
+        self.bind(size=lambda *args: setattr(self, 'text_size', (self.width - 20, None)))
+        self.bind(on_press=lambda x: self.next())
+        self._hide = Clock.create_trigger(lambda dt: self.next(), self.SHOW_SECONDS)
+    
+    def push(self, reminders):
+        """Ставить групу нагадувань у чергу показу"""
+        self.queue.append(reminders)
+        if self.parent is None:
+            self.next()
+    
+    def next(self):
+        """Показує наступну групу або ховає сповіщення"""
+        self._hide.cancel()
+        if not self.queue:
+            if self.parent is not None:
+                Window.remove_widget(self)
+            return
+        reminders = self.queue.popleft()
+        self.text = f'{batch_title(reminders).upper()}\n{batch_text(reminders)}'
+        if self.parent is None:
+            Window.add_widget(self)
+        self._hide()
+
+class SearchResultRow(RecycleDataViewBehavior, Button):
+    """Рядок результатів пошуку: дата, час і назва нагадування"""
+    def __init__(self, **kwargs):
+        super(SearchResultRow, self).__init__(
             font_size=14,
-            text_size=(400, None),
             halign='left',
-            valign='bottom',
-            color=(0.4, 0.5, 0.6, 1)
+            valign='middle',
+            color=(0.2, 0.3, 0.4, 1),
+            background_color=(0.9, 0.93, 0.97, 1),
+            **kwargs
         )
+        count('widgets_created')
+        self.reminder = None
+        self.popup = None
+        self.bind(size=lambda *args: setattr(self, 'text_size', (self.width - 20, None)))
+        self.bind(on_press=lambda x: self.popup.select(self.reminder))
+    
+    def refresh_view_attrs(self, rv, index, data):
+        """Заповнює рядок даними нагадування"""
+        self.popup = rv.popup
+        reminder = data['reminder']
+        self.reminder = reminder
+        repeat = ' (повторюється)' if isinstance(reminder, Occurrence) else ''
+        self.text = f'{reminder.dt:%d.%m.%Y} {reminder.time}{repeat}  {reminder.title}'
+        return super(SearchResultRow, self).refresh_view_attrs(rv, index, data)
+
+class SearchPopup(Popup):
+    """Пошук нагадувань за словами назви з переходом до дати в календарі"""
+    # Скільки найближчих результатів показувати
+    LIMIT = 100
+    
+    def __init__(self, app_instance, **kwargs):
+        super(SearchPopup, self).__init__(**kwargs)
+        self.app_instance = app_instance
         
-        info_layout.add_widget(title_label)
-        info_layout.add_widget(time_label)
-        
-   
-        delete_btn = Button(
-            text='Видалити',
-            size_hint_x=0.25,
-            font_size=14,
-            background_color=(0.7, 0.75, 0.8, 1)
-        )
-        delete_btn.bind(on_press=lambda x: self.delete_reminder(reminder))
+        self.title = 'Пошук нагадувань'
+        self.size_hint = (0.95, 0.9)
         
-        item_layout.add_widget(info_layout)
-        item_layout.add_widget(delete_btn)
+        main_layout = BoxLayout(orientation='vertical', spacing=10, padding=15)
         
-        return item_layout
-    
-    def delete_reminder(self, reminder):
-        """Видаляє нагадування"""
-        self.app_instance.reminders = [r for r in self.app_instance.reminders if r['id'] != reminder['id']]
-        self.app_instance.save_reminders()
-        self.load_day_reminders()
-        self.app_instance.update_calendar()
-        self.show_message('Видалено', 'Нагадування видалено!')
-    
-    def show_message(self, title, message):
-        """Показує коротке повідомлення"""
-        popup_layout = BoxLayout(orientation='vertical', spacing=15, padding=20)
+        self.query_input = TextInput(
+            hint_text='Слова або їх початки, наприклад: зуст лік',
+            multiline=False,
+            size_hint_y=None,
+            height=40,
+            font_size=14
+        )
+        # Пошук запускається не частіше одного разу за кадр
+        self.query_input.bind(text=Clock.create_trigger(lambda dt: self.run_search()))
         
-        popup_layout.add_widget(Label(
-            text=message,
-            font_size=16,
-            text_size=(300, None),
-            halign='center'
-        ))
+        self.status_label = Label(
+            text='',
+            font_size=14,
+            size_hint_y=None,
+            height=30,
+            color=(0.4, 0.5, 0.6, 1)
+        )
         
-        ok_btn = Button(
-            text='OK',
+        self.results_view = RecycleView()
+        self.results_view.popup = self
+        rows_layout = RecycleBoxLayout(
+            orientation='vertical',
             size_hint_y=None,
-            height=45,
-            background_color=(0.4, 0.6, 0.85, 1)
+            default_size=(None, 45),
+            default_size_hint=(1, None),
+            spacing=5
         )
+        rows_layout.bind(minimum_height=rows_layout.setter('height'))
+        self.results_view.add_widget(rows_layout)
+        # viewclass задається після layout manager, інакше RecycleView його відкидає
+        self.results_view.viewclass = SearchResultRow
         
-        popup = Popup(
-            title=title,
-            content=popup_layout,
-            size_hint=(0.7, 0.4)
+        close_btn = Button(
+            text='Закрити',
+            size_hint_y=None,
+            height=50,
+            background_color=(0.6, 0.7, 0.8, 1),
+            font_size=16
         )
+        close_btn.bind(on_press=self.dismiss)
         
-        ok_btn.bind(on_press=popup.dismiss)
-        popup_layout.add_widget(ok_btn)
-        popup.open()
+        main_layout.add_widget(self.query_input)
+        main_layout.add_widget(self.status_label)
+        main_layout.add_widget(self.results_view)
+        main_layout.add_widget(close_btn)
+        
+        self.content = main_layout
+        self.query_input.focus = True
+    
+    def run_search(self):
+        """Оновлює список результатів для поточного запиту"""
+        query = self.query_input.text
+        if not query.strip():
+            self.results_view.data = []
+            self.status_label.text = ''
+            return
+        results = self.app_instance.engine.search(query, self.LIMIT)
+        self.results_view.data = [{'reminder': reminder} for reminder in results]
+        if not results:
+            self.status_label.text = 'Нічого не знайдено'
+        elif len(results) == self.LIMIT:
+            self.status_label.text = f'Показано {self.LIMIT} найближчих'
+        else:
+            self.status_label.text = f'Знайдено: {len(results)}'
+    
+    def select(self, reminder):
+        """Закриває пошук і показує день нагадування в календарі"""
+        self.dismiss()
+        self.app_instance.goto_date(reminder.dt.date())
 
 class CalendarApp(App):
     def __init__(self):
         super().__init__()
-        self.reminders = []
+        self.engine = ReminderEngine(open_storage(STORAGE_MODE, 'reminders.json'), Clock, self.fire_reminders)
+        # Запис на диск не блокує кадр; помилки показуються користувачу
+        self.engine.use_background_writer()
+        self.engine.on_error = self.show_save_error
+        self._error_popup = None
+        # Сповіщення групуються і розсилаються каналам у їхніх потоках
+        self.toasts = None
+        self.notifier = NotificationDispatcher(sinks_from_spec(NOTIFY_SINKS, toast=self.queue_toast))
+        self.archive = ReminderArchive(ARCHIVE_PATH)
+        self.engine.archive = self.archive
+        # Сховище разом з архівом для сітки; створюється заново для нового сховища
+        self._view = None
         self.current_date = datetime.now().date()
-        self.load_reminders()
+        # День, до якого перейшли з пошуку; підсвічується в сітці
+        self.selected_date = None
+        # Обчислені місяці сітки; сусідні з показаним обчислюються заздалегідь
+        self.month_cache = MonthCache()
+        self._prefetch = Clock.create_trigger(self.prefetch_months, 0.1)
+        self.loaded = False
+        self.summary = None
+        # Файли нагадувань має лише один власник; поки їх тримає фонова
+        # служба (reminder_daemon.py), застосунок їх не читає і не пише
+        self.owner_lock = OwnerLock('reminders.json')
+        self.locked_out = not self.owner_lock.acquire()
+        if self.locked_out:
+            return
+        if FAST_START:
+            self.summary = read_summary(SUMMARY_PATH)
+        else:
+            self.load_reminders()
+    
+    @property
+    def store(self):
+        """Сховище нагадувань ядра"""
+        return self.engine.store
+    
+    @property
+    def calendar_source(self):
+        """Звідки сітка бере лічильники: підсумок до завантаження, далі сховище з архівом"""
+        if not self.loaded and self.summary is not None:
+            return self.summary
+        if self._view is None or self._view.store is not self.store:
+            self._view = TieredView(self.store, self.archive)
+        return self._view
+    
+    def on_start(self):
+        """Запускає фонове завантаження нагадувань у режимі швидкого старту"""
+        if not self.loaded and not self.locked_out:
+            threading.Thread(target=self._load_worker, daemon=True).start()
+    
+    def _load_worker(self):
+        """Фоновий потік: читання та очищення нагадувань
+
+        Пошуковий індекс будується лише під час першого пошуку: у режимах
+        sqlite і binary старт не читає всіх записів.
+        """
+        store = self.engine.open()
+        self.save_summary(store)
+        Clock.schedule_once(lambda dt: self._load_done(store))
+    
+    def _load_done(self, store):
+        """Головний потік: підміняє підсумок повним сховищем"""
+        self.engine.attach(store)
+        self.loaded = True
+        self.summary = None
+        self.update_calendar()
+        self.schedule_notifications()
+    
+    def save_summary(self, store):
+        """Зберігає підсумок для наступного швидкого старту"""
+        try:
+            write_summary(SUMMARY_PATH, ReminderSummary.from_store(store, datetime.now().date()))
+        except Exception as e:
+            print(f"Помилка збереження: {e}")
         
     def build(self):
+        if self.locked_out:
+            return Label(
+                text=f'Нагадування вже відкрито іншим процесом (pid {self.owner_lock.owner()}).\n'
+                     'Зупиніть фонову службу і запустіть календар знову.',
+                halign='center',
+                color=(0.3, 0.3, 0.3, 1)
+            )
         main_layout = BoxLayout(orientation='vertical', padding=10, spacing=10)
         
 
@@ -651,7 +1332,34 @@ class CalendarApp(App):
         )
         bulk_add_btn.bind(on_press=self.open_bulk_add)
         
+        search_btn = Button(
+            text='Пошук',
+            size_hint_x=0.3,
+            background_color=(0.5, 0.65, 0.8, 1),
+            font_size=16
+        )
+        search_btn.bind(on_press=self.open_search)
+        
+        year_btn = Button(
+            text='Рік',
+            size_hint_x=0.2,
+            background_color=(0.5, 0.65, 0.8, 1),
+            font_size=16
+        )
+        year_btn.bind(on_press=lambda x: self.open_overview(12))
+        
+        quarter_btn = Button(
+            text='3 міс.',
+            size_hint_x=0.2,
+            background_color=(0.5, 0.65, 0.8, 1),
+            font_size=16
+        )
+        quarter_btn.bind(on_press=lambda x: self.open_overview(3))
+        
         bulk_add_layout.add_widget(bulk_add_btn)
+        bulk_add_layout.add_widget(search_btn)
+        bulk_add_layout.add_widget(year_btn)
+        bulk_add_layout.add_widget(quarter_btn)
         
  
         self.calendar_grid = GridLayout(cols=7, spacing=5, padding=10)
@@ -669,11 +1377,20 @@ class CalendarApp(App):
             )
             self.calendar_grid.add_widget(day_label)
         
+        # 6 тижнів по 7 днів - максимум, який може зайняти місяць
+        self.day_cells = []
+        for i in range(42):
+            day_btn = DayButton()
+            day_btn.bind(on_press=self.on_day_press)
+            self.calendar_grid.add_widget(day_btn)
+            self.day_cells.append(day_btn)
+        
         legend_layout = BoxLayout(orientation='horizontal', size_hint_y=None, height=40, spacing=20, padding=[20, 5])
         
         legend_items = [
             ('Сьогодні', (0.4, 0.6, 0.85, 1)),
             ('Є нагадування', (0.5, 0.7, 0.9, 1)),
+            ('Багато нагадувань', (0.2, 0.4, 0.7, 1)),
             ('Звичайний день', (1, 1, 1, 1))
         ]
         
@@ -704,64 +1421,129 @@ class CalendarApp(App):
         main_layout.add_widget(self.calendar_grid)
         main_layout.add_widget(legend_layout)
         
+        # Зміни в ядрі перемальовують календар не більше одного разу за кадр
+        self.engine.on_change = Clock.create_trigger(lambda dt: self.update_calendar())
+        # Дописаний архів (потік запису) - теж, бо місяць міг прочитатися без нових рядків
+        self.archive.on_change = lambda: Clock.schedule_once(lambda dt: self.engine.on_change())
         self.update_calendar()
-        self.schedule_notifications()
+        if self.loaded:
+            self.schedule_notifications()
+        if profiler.enabled:
+            self.start_profiling()
         
         return main_layout
     
+    def start_profiling(self):
+        """Гістограма кадрів і накладка з замірами (F12 показує чи ховає її)"""
+        Clock.schedule_interval(profiler.frame, 0)
+        # Заміри дописуються у файл раз на хвилину, решта - при закритті
+        Clock.schedule_interval(lambda dt: profiler.flush(), 60)
+        
+        self.profile_label = Label(
+            font_size=11,
+            halign='left',
+            valign='top',
+            color=(0.1, 0.1, 0.1, 1),
+            size_hint=(None, None)
+        )
+        self.profile_label.bind(texture_size=lambda label, size: setattr(label, 'size', size))
+        
+        def refresh(dt):
+            if self.profile_label.parent is not None:
+                self.profile_label.text = profiler.report()
+                self.profile_label.pos = (10, Window.height - self.profile_label.height - 10)
+        Clock.schedule_interval(refresh, 0.5)
+        
+        def on_key_down(window, key, *args):
+            # 293 - код клавіші F12
+            if key != 293:
+                return False
+            if self.profile_label.parent is None:
+                Window.add_widget(self.profile_label)
+                refresh(0)
+            else:
+                Window.remove_widget(self.profile_label)
+            return True
+        Window.bind(on_key_down=on_key_down)
+    
+    @timed('update_calendar')
     def update_calendar(self):
         """Оновлює відображення календаря"""
-
-        calendar_children = list(self.calendar_grid.children)
-        for child in calendar_children[:-7]: 
-            self.calendar_grid.remove_widget(child)
-        
-       
         months_ua = ['Січень', 'Лютий', 'Березень', 'Квітень', 'Травень', 'Червень',
                      'Липень', 'Серпень', 'Вересень', 'Жовтень', 'Листопад', 'Грудень']
         
         self.month_year_label.text = f"{months_ua[self.current_date.month - 1]} {self.current_date.year}"
         
 
-        total_count = len(self.reminders)
-        today_count = len([r for r in self.reminders 
-                          if r.get('date') == datetime.now().strftime('%d.%m.%Y')])
+        today = datetime.now().date()
+        # До завершення фонового завантаження дані беруться з підсумку,
+        # а архів минулого місяця читається, лише коли його показують
+        source = self.calendar_source
+        total_count = len(source)
+        today_count = source.count_on(today)
         self.stats_label.text = f'Всього нагадувань: {total_count} | Сьогодні: {today_count}'
+        if not self.loaded:
+            self.stats_label.text += ' | Завантаження...'
  
-        cal = calendar.monthcalendar(self.current_date.year, self.current_date.month)
-        today = datetime.now().date()
+        model = self.month_cache.get(source, self.current_date.year, self.current_date.month, today)
+        counts = model.counts
      
-        for week in cal:
-            for day in week:
-                if day == 0:
-               
-                    empty_label = Label(text='', size_hint=(None, None), size=(70, 70))
-                    self.calendar_grid.add_widget(empty_label)
-                else:
-                    date_obj = datetime(self.current_date.year, self.current_date.month, day).date()
-                    
-           
-                    date_str = date_obj.strftime('%d.%m.%Y')
-                    has_reminders = any(r.get('date') == date_str for r in self.reminders)
-                    
-                   
-                    day_btn = DayButton(
-                        day=day,
-                        is_today=(date_obj == today),
-                        has_reminders=has_reminders
-                    )
-                    
-                    day_btn.bind(on_press=lambda x, d=date_obj: self.open_day_detail(d))
-                    
-                    self.calendar_grid.add_widget(day_btn)
+        for i, cell in enumerate(self.day_cells):
+            date_obj = model.dates[i]
+            if date_obj is not None:
+                cell.set_day(date_obj.day, date_obj, is_today=(i == model.today_index),
+                             reminder_count=counts[date_obj.day], is_selected=(date_obj == self.selected_date))
+            else:
+                cell.set_day(0)
+        self._prefetch()
+    
+    def prefetch_months(self, dt=None):
+        """Обчислює сусідні з показаним місяці, поки користувач нічого не робить"""
+        source = self.calendar_source
+        self.month_cache.prefetch(source, self.current_date.year, self.current_date.month, datetime.now().date())
+    
+    def on_day_press(self, instance):
+        """Обробляє натискання на клітинку дня"""
+        # Поки нагадування завантажуються, змінювати їх не можна
+        if instance.date is not None and self.loaded:
+            self.open_day_detail(instance.date)
+    
+    def import_reminders(self, reminders):
+        """Додає пачку нагадувань: один запис на диск і одне оновлення календаря"""
+        self.engine.add_many(reminders)
     
     def open_day_detail(self, date_obj):
         """Відкриває деталі дня"""
         popup = ReminderDetailPopup(date_obj, self)
         popup.open()
     
+    def open_search(self, instance):
+        """Відкриває пошук нагадувань"""
+        if not self.loaded:
+            return
+        SearchPopup(self).open()
+    
+    def open_overview(self, span):
+        """Відкриває огляд року чи кількох місяців"""
+        if not self.loaded:
+            return
+        OverviewPopup(self, span).open()
+    
+    def show_month(self, year, month):
+        """Показує місяць у сітці календаря"""
+        self.current_date = date(year, month, 1)
+        self.update_calendar()
+    
+    def goto_date(self, date_obj):
+        """Показує місяць дати й підсвічує її в сітці"""
+        self.current_date = date_obj
+        self.selected_date = date_obj
+        self.update_calendar()
+    
     def open_bulk_add(self, instance):
         """Відкриває вікно масового додавання подій"""
+        if not self.loaded:
+            return
         popup = BulkAddPopup(self)
         popup.open()
     
@@ -784,109 +1566,83 @@ class CalendarApp(App):
     def goto_today(self, instance):
         """Перехід до поточного місяця"""
         self.current_date = datetime.now().date()
+        self.selected_date = None
         self.update_calendar()
     
     def schedule_notifications(self):
-        """Планує перевірку нагадувань"""
-        Clock.schedule_interval(self.check_reminders, 60)
+        """Запускає планувальник сповіщень"""
+        self.engine.start()
     
-    def check_reminders(self, dt):
-        """Перевіряє нагадування"""
-        now = datetime.now()
-        
-        for reminder in self.reminders[:]:
-            if 'datetime' in reminder:
-                reminder_datetime = datetime.fromisoformat(reminder['datetime'])
-                
-                if (abs((reminder_datetime - now).total_seconds()) < 60 and 
-                    reminder_datetime <= now):
-                    
-                    self.show_notification(reminder)
-                    self.reminders.remove(reminder)
-                    self.save_reminders()
-                    self.update_calendar()
-    
-    def show_notification(self, reminder):
-        """Показує сповіщення"""
-        popup_layout = BoxLayout(orientation='vertical', spacing=15, padding=20)
-        
-        popup_layout.add_widget(Label(
-            text='ЧАС НАГАДУВАННЯ!',
-            font_size=22,
-            color=(0.3, 0.5, 0.7, 1),
-            bold=True
-        ))
-        
-        popup_layout.add_widget(Label(
-            text=reminder['title'],
-            font_size=18,
-            text_size=(400, None),
-            halign='center',
-            color=(0.2, 0.3, 0.4, 1)
-        ))
-        
-        datetime_str = f"{reminder.get('date', '')} {reminder.get('time', '')}"
-        popup_layout.add_widget(Label(
-            text=datetime_str,
-            font_size=14,
-            color=(0.4, 0.5, 0.6, 1)
-        ))
-        
-        ok_btn = Button(
-            text='Зрозуміло',
-            size_hint_y=None,
-            height=50,
-            background_color=(0.4, 0.6, 0.85, 1),
-            font_size=16
-        )
-        
-        popup = Popup(
-            title='Нагадування',
-            content=popup_layout,
-            size_hint=(0.9, 0.6),
-            auto_dismiss=False
-        )
+    def fire_reminders(self, reminders):
+        """Розсилає нагадування, час яких настав (ядро вже прибрало їх), одним груповим сповіщенням"""
+        self.notifier.notify(reminders)
+    
+    def queue_toast(self, reminders):
+        """Канал toast: викликається в потоці каналу, показ - у головному потоці"""
+        Clock.schedule_once(lambda dt: self.show_toast(reminders))
+    
+    def show_toast(self, reminders):
+        """Показує групу нагадувань у немодальному сповіщенні"""
+        if self.toasts is None:
+            self.toasts = ToastQueue()
+        self.toasts.push(reminders)
+    
+    def show_save_error(self, error):
+        """Повідомляє, що зміни не вдалося записати на диск"""
+        if self._error_popup is None:
+            popup_layout = BoxLayout(orientation='vertical', spacing=15, padding=20)
+            
+            self._error_label = Label(
+                font_size=16,
+                text_size=(350, None),
+                halign='center',
+                color=(0.8, 0.3, 0.3, 1)
+            )
+            popup_layout.add_widget(self._error_label)
+            
+            ok_btn = Button(
+                text='OK',
+                size_hint_y=None,
+                height=45,
+                background_color=(0.4, 0.6, 0.85, 1)
+            )
+            
+            # Одне вікно на всі помилки, щоб повторні збої не накопичували попапи
+            self._error_popup = Popup(
+                title='Помилка збереження',
+                content=popup_layout,
+                size_hint=(0.8, 0.4)
+            )
+            
+            ok_btn.bind(on_press=self._error_popup.dismiss)
+            popup_layout.add_widget(ok_btn)
         
-        ok_btn.bind(on_press=popup.dismiss)
-        popup_layout.add_widget(ok_btn)
-        popup.open()
+        self._error_label.text = f'Не вдалося зберегти нагадування:\n{error}'
+        if self._error_popup.parent is None:
+            self._error_popup.open()
     
-    def save_reminders(self):
-        """Зберігає нагадування"""
-        try:
-            with open('reminders.json', 'w', encoding='utf-8') as f:
-                json.dump(self.reminders, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"Помилка збереження: {e}")
+    def on_stop(self):
+        """Ущільнює журнал змін при закритті застосунку"""
+        if not self.loaded:
+            # Фонове завантаження ще триває - на диску нічого не змінювалось
+            profiler.flush()
+            self.owner_lock.release()
+            return
+        self.engine.stop()
+        self.save_summary(self.store)
+        # Сповіщення, що ще в чергах каналів, доставляються до виходу
+        self.notifier.close()
+        profiler.flush()
+        self.owner_lock.release()
     
     def load_reminders(self):
         """Завантажує нагадування"""
-        try:
-            if os.path.exists('reminders.json'):
-                with open('reminders.json', 'r', encoding='utf-8') as f:
-                    self.reminders = json.load(f)
-                    self.cleanup_old_reminders()
-        except Exception as e:
-            print(f"Помилка завантаження: {e}")
-            self.reminders = []
+        self.engine.load()
+        self.loaded = True
     
     def cleanup_old_reminders(self):
         """Видаляє старі нагадування"""
-        now = datetime.now()
-        valid_reminders = []
-        
-        for reminder in self.reminders:
-            try:
-                if 'datetime' in reminder:
-                    reminder_datetime = datetime.fromisoformat(reminder['datetime'])
-                    if reminder_datetime > now:
-                        valid_reminders.append(reminder)
-            except:
-                continue
-        
-        if len(valid_reminders) != len(self.reminders):
-            self.reminders = valid_reminders
-            self.save_reminders()
+        self.engine.cleanup()
 
 if __name__ == "__main__":
     CalendarApp().run()
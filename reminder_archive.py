@@ -0,0 +1,217 @@
+"""Архів минулих нагадувань: стиснений файл на кожен місяць
+
+Нагадування, що спрацювали або прострочились, не видаляються, а
+дописуються в <тека>/РРРР-ММ.jsonl.gz рядками у форматі reminders.json.
+Кожне дописування - окремий член gzip, тож файл ніколи не переписується.
+Місяць читається з диска лише тоді, коли його вперше показують.
+"""
+import gzip
+import json
+import os
+import re
+import threading
+import zlib
+from collections import OrderedDict
+
+from reminder_store import _EMPTY_MONTH, reminders_from_dicts
+
+ARCHIVE_NAME = re.compile(r'^(\d{4})-(\d{2})\.jsonl\.gz$')
+
+
+def archive_path(path):
+    """Тека архіву поруч із файлом нагадувань: reminders.json -> reminders.archive"""
+    return os.path.splitext(path)[0] + '.archive'
+
+
+class ArchivedMonth:
+    """Завантажений місяць архіву: нагадування за днями і лічильники"""
+    __slots__ = ('by_day', 'counts')
+
+    def __init__(self):
+        self.by_day = {}
+        self.counts = [0] * 32
+
+    def add(self, reminder):
+        day = reminder.dt.day
+        self.by_day.setdefault(day, []).append(reminder)
+        self.counts[day] += 1
+
+
+class ReminderArchive:
+    """Холодне сховище минулих нагадувань з лінивим читанням місяців
+
+    prepare(reminders) одразу враховує записи в пам'яті і повертає задачу
+    запису на диск, яку можна виконати в потоці запису; write() робить
+    те саме одразу. Після кожного дописування викликається on_change() (у
+    потоці запису), щоб інтерфейс перемалював місяці, прочитані без нових
+    рядків. У пам'яті тримається не більше CACHED_MONTHS місяців.
+    """
+    CACHED_MONTHS = 12
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.on_change = None
+        self._lock = threading.Lock()
+        # Читання і дописування файлів не перетинаються; береться раніше за _lock
+        self._io_lock = threading.Lock()
+        # Місяці, для яких є файл чи ще не записані дані
+        self._months = set()
+        if os.path.isdir(directory):
+            for name in os.listdir(directory):
+                match = ARCHIVE_NAME.match(name)
+                if match:
+                    self._months.add((int(match.group(1)), int(match.group(2))))
+        self._loaded = OrderedDict()
+        self._revisions = {}
+
+    def path(self, year, month):
+        """Файл архіву місяця"""
+        return os.path.join(self.directory, f'{year:04d}-{month:02d}.jsonl.gz')
+
+    def months(self):
+        """Місяці, що є в архіві, у порядку часу"""
+        with self._lock:
+            return sorted(self._months)
+
+    def prepare(self, reminders):
+        """Додає записи до архіву в пам'яті; повертає задачу запису або None"""
+        if not reminders:
+            return None
+        groups = {}
+        for reminder in reminders:
+            dt = reminder.dt
+            groups.setdefault((dt.year, dt.month), []).append(reminder)
+
+        with self._lock:
+            for key, items in groups.items():
+                self._months.add(key)
+                self._revisions[key] = self._revisions.get(key, 0) + 1
+                loaded = self._loaded.get(key)
+                if loaded is not None:
+                    for reminder in items:
+                        loaded.add(reminder)
+
+        data = {
+            key: ''.join(json.dumps(r.to_dict(), ensure_ascii=False, separators=(',', ':')) + '\n' for r in items)
+            for key, items in groups.items()
+        }
+        return lambda: self._append(data)
+
+    def write(self, reminders):
+        """Додає записи до архіву і одразу записує їх на диск"""
+        job = self.prepare(reminders)
+        if job is not None:
+            job()
+
+    def _append(self, data):
+        os.makedirs(self.directory, exist_ok=True)
+        for (year, month), text in data.items():
+            with self._io_lock:
+                with gzip.open(self.path(year, month), 'at', encoding='utf-8') as f:
+                    f.write(text)
+                # Місяць, вивантажений з пам'яті до кінця запису, міг прочитатися
+                # без цих рядків - новий номер зміни змусить перечитати його
+                with self._lock:
+                    self._loaded.pop((year, month), None)
+                    self._revisions[(year, month)] = self._revisions.get((year, month), 0) + 1
+        if self.on_change is not None:
+            self.on_change()
+
+    def _cached(self, key):
+        with self._lock:
+            loaded = self._loaded.get(key)
+            if loaded is not None:
+                self._loaded.move_to_end(key)
+            return loaded, key in self._months
+
+    def _month(self, year, month):
+        """Завантажений місяць або None, якщо його немає в архіві"""
+        key = (year, month)
+        loaded, known = self._cached(key)
+        if loaded is not None or not known:
+            return loaded
+
+        with self._io_lock:
+            # Поки чекали, місяць міг прочитати інший потік
+            loaded, _ = self._cached(key)
+            if loaded is not None:
+                return loaded
+            records, complete = self._read(self.path(year, month))
+            loaded = ArchivedMonth()
+            for reminder in reminders_from_dicts(records):
+                loaded.add(reminder)
+            if complete:
+                with self._lock:
+                    self._loaded[key] = loaded
+                    while len(self._loaded) > self.CACHED_MONTHS:
+                        self._loaded.popitem(last=False)
+            return loaded
+
+    @staticmethod
+    def _read(path):
+        """Записи файлу місяця і чи прочитано його повністю
+
+        Обірваний останній член gzip (аварійне завершення чи запис іншим
+        процесом) не робить місяць порожнім: повертаються записи до нього, а
+        місяць не кешується і перечитується під час наступного запиту.
+        """
+        records = []
+        if not os.path.exists(path):
+            return records, True
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        # Обірваний рядок після аварійного завершення
+                        continue
+        except (OSError, EOFError, zlib.error) as e:
+            print(f"Помилка читання архіву: {e}")
+            return records, False
+        return records, True
+
+    def month_counts(self, year, month):
+        """Кількість архівних нагадувань по днях місяця"""
+        loaded = self._month(year, month)
+        return _EMPTY_MONTH if loaded is None else loaded.counts
+
+    def month_revision(self, year, month):
+        """Номер зміни архівного місяця"""
+        return self._revisions.get((year, month), 0)
+
+    def on_date(self, date_obj):
+        """Архівні нагадування дня"""
+        loaded = self._month(date_obj.year, date_obj.month)
+        if loaded is None:
+            return []
+        return list(loaded.by_day.get(date_obj.day, ()))
+
+
+class TieredView:
+    """Сховище нагадувань разом з архівом для малювання календаря
+
+    Відповідає на ті ж запити, що й ReminderStore під час малювання,
+    додаючи до лічильників днів архівні. Кількість (len) і count_on для
+    статистики - лише гарячі нагадування. Архівний місяць читається з
+    диска під час першого запиту.
+    """
+    def __init__(self, store, archive):
+        self.store = store
+        self.archive = archive
+
+    def __len__(self):
+        return len(self.store)
+
+    def month_counts(self, year, month):
+        hot = self.store.month_counts(year, month)
+        cold = self.archive.month_counts(year, month)
+        if cold is _EMPTY_MONTH:
+            return hot
+        return [a + b for a, b in zip(hot, cold)]
+
+    def month_revision(self, year, month):
+        return (self.store.month_revision(year, month), self.archive.month_revision(year, month))
+
+    def count_on(self, date_obj):
+        return self.store.count_on(date_obj)
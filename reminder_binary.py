@@ -0,0 +1,258 @@
+"""Двійковий знімок нагадувань, що читається через mmap
+
+Структура файлу:
+    заголовок      HEADER
+    записи         RECORD на кожне разове нагадування, відсортовані за (ts, id)
+    індекс id      ID_ENTRY (id, номер запису), відсортований за id
+    рядки          назви нагадувань у UTF-8 підряд
+    серії          список серій JSON у UTF-8 (схема Reminder.to_dict)
+
+Записи мають фіксовану довжину, тож пошук за часом і за id - бінарний
+пошук прямо у відображеній пам'яті; сторінки файлу читаються лише тоді,
+коли до них звертаються.
+"""
+import json
+import mmap
+import struct
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+
+from reminder_store import Reminder, ReminderStore, _EMPTY_MONTH
+
+MAGIC = b'RMDB'
+VERSION = 1
+# magic, версія, резерв, кількість записів, довжина серій, next_id,
+# зміщення записів, індексу id, рядків і серій
+HEADER = struct.Struct('<4sHHIIQQQQQ')
+# ts, id, created, зміщення назви в таблиці рядків, довжина назви
+RECORD = struct.Struct('<qqqII')
+ID_ENTRY = struct.Struct('<qI')
+_TS = struct.Struct('<q')
+# created відсутній
+NO_CREATED = -2 ** 63
+
+
+def encode_snapshot(next_id, singles, series):
+    """Кодує знімок у байти
+
+    singles - кортежі (ts, id, created, title) разових нагадувань,
+    series - словники серій у схемі Reminder.to_dict.
+    """
+    singles = sorted(singles, key=lambda r: (r[0], r[1]))
+    records = []
+    strings = []
+    offset = 0
+    for ts, reminder_id, created, title in singles:
+        data = title.encode('utf-8')
+        records.append(RECORD.pack(ts, reminder_id, NO_CREATED if created is None else created, offset, len(data)))
+        strings.append(data)
+        offset += len(data)
+
+    ids = sorted((r[1], i) for i, r in enumerate(singles))
+    id_index = b''.join(ID_ENTRY.pack(reminder_id, i) for reminder_id, i in ids)
+    series_data = json.dumps(series, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    records_off = HEADER.size
+    ids_off = records_off + RECORD.size * len(records)
+    strings_off = ids_off + len(id_index)
+    series_off = strings_off + offset
+    header = HEADER.pack(
+        MAGIC, VERSION, 0, len(records), len(series_data), next_id,
+        records_off, ids_off, strings_off, series_off
+    )
+    return b''.join([header] + records + [id_index] + strings + [series_data])
+
+
+class BinarySnapshot:
+    """Знімок, відображений у пам'ять; записи декодуються на вимогу"""
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, _, self.count, self._series_len, self.next_id,
+         self._records_off, self._ids_off, self._strings_off, self._series_off) = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self._mm.close()
+            raise ValueError(f'Невідомий формат знімка: {path}')
+
+    def close(self):
+        self._mm.close()
+
+    def ts_at(self, index):
+        """Момент запису з номером index"""
+        return _TS.unpack_from(self._mm, self._records_off + index * RECORD.size)[0]
+
+    def id_at(self, index):
+        """id запису з номером index"""
+        return _TS.unpack_from(self._mm, self._records_off + index * RECORD.size + 8)[0]
+
+    def record(self, index):
+        """Декодує запис з номером index у Reminder"""
+        ts, reminder_id, created, offset, length = RECORD.unpack_from(
+            self._mm, self._records_off + index * RECORD.size
+        )
+        start = self._strings_off + offset
+        title = self._mm[start:start + length].decode('utf-8')
+        return Reminder(reminder_id, title, ts, None if created == NO_CREATED else created)
+
+    def bisect(self, ts):
+        """Номер першого запису з моментом не раніше ts"""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.ts_at(mid) < ts:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def find(self, reminder_id):
+        """Номер запису з id або None"""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            found, index = ID_ENTRY.unpack_from(self._mm, self._ids_off + mid * ID_ENTRY.size)
+            if found < reminder_id:
+                lo = mid + 1
+            elif found > reminder_id:
+                hi = mid
+            else:
+                return index
+        return None
+
+    def series(self):
+        """Словники серій повторюваних нагадувань"""
+        data = self._mm[self._series_off:self._series_off + self._series_len]
+        return json.loads(data.decode('utf-8')) if data else []
+
+
+def snapshot_records(frozen):
+    """Дані для encode_snapshot з результату ReminderStore.freeze(): (next_id, разові, серії)"""
+    next_id, singles, series = frozen
+    records = [(r.ts, r.id, r.created, r.title) for r in singles]
+    return next_id, records, series
+
+
+class MmapReminderStore(ReminderStore):
+    """Сховище поверх двійкового знімка
+
+    Знімок лише читається; додані нагадування тримаються в пам'яті, а
+    видалені записи знімка запам'ятовуються за id. Відкриття не декодує
+    жодного запису, а лічильники місяця - це 32 бінарні пошуки.
+    """
+    def __init__(self, snapshot, next_id=1):
+        self._snapshot = snapshot
+        super(MmapReminderStore, self).__init__(None, next_id)
+        for data in snapshot.series():
+            series = Reminder.from_dict(data)
+            self._series[series.id] = series
+
+    def _init_singles(self):
+        # Нагадування, додані після знімка: id -> Reminder і відсортовані (ts, id)
+        self._added = {}
+        self._added_timeline = []
+        # Видалені записи знімка: id -> ts
+        self._deleted = {}
+        self._month_cache = {}
+
+    def _invalidate(self, ts):
+        dt = datetime.fromtimestamp(ts)
+        self._month_cache.pop((dt.year, dt.month), None)
+        self._month_changed((dt.year, dt.month))
+
+    def _count_singles(self):
+        return self._snapshot.count - len(self._deleted) + len(self._added)
+
+    def _get_single(self, reminder_id):
+        reminder = self._added.get(reminder_id)
+        if reminder is not None or not isinstance(reminder_id, int) or reminder_id in self._deleted:
+            return reminder
+        index = self._snapshot.find(reminder_id)
+        return None if index is None else self._snapshot.record(index)
+
+    def _insert_single(self, reminder):
+        self._added[reminder.id] = reminder
+        insort(self._added_timeline, (reminder.ts, reminder.id))
+        self._invalidate(reminder.ts)
+
+    def _insert_singles(self, reminders):
+        for reminder in reminders:
+            self._insert_single(reminder)
+
+    def _delete_single(self, reminder_id):
+        reminder = self._added.pop(reminder_id, None)
+        if reminder is not None:
+            timeline = self._added_timeline
+            del timeline[bisect_left(timeline, (reminder.ts, reminder_id))]
+        else:
+            reminder = self._get_single(reminder_id)
+            if reminder is None:
+                return None
+            self._deleted[reminder_id] = reminder.ts
+        self._invalidate(reminder.ts)
+        return reminder
+
+    def _singles_between(self, start, end):
+        snapshot = self._snapshot
+        lo = 0 if start is None else snapshot.bisect(start)
+        hi = snapshot.count if end is None else snapshot.bisect(end)
+        deleted = self._deleted
+        result = []
+        for i in range(lo, hi):
+            if not deleted or snapshot.id_at(i) not in deleted:
+                result.append(snapshot.record(i))
+
+        timeline = self._added_timeline
+        a = 0 if start is None else bisect_left(timeline, (start,))
+        b = len(timeline) if end is None else bisect_left(timeline, (end,))
+        if a < b:
+            result.extend(self._added[reminder_id] for _, reminder_id in timeline[a:b])
+            result.sort(key=lambda r: (r.ts, r.id))
+        return result
+
+    def _frozen_singles(self):
+        # Відображений знімок не змінюється, тож записи декодує вже той,
+        # хто обходитиме результат (потік запису)
+        snapshot, deleted, added = self._snapshot, dict(self._deleted), list(self._added.values())
+
+        def singles():
+            for i in range(snapshot.count):
+                if snapshot.id_at(i) not in deleted:
+                    yield snapshot.record(i)
+            yield from added
+        return singles()
+
+    def _singles_on_date(self, date_obj):
+        start = datetime(date_obj.year, date_obj.month, date_obj.day)
+        return self._singles_between(int(start.timestamp()), int((start + timedelta(days=1)).timestamp()))
+
+    def _single_month_counts(self, year, month):
+        counts = self._month_cache.get((year, month))
+        if counts is not None:
+            return counts
+
+        first = datetime(year, month, 1)
+        # Початки днів місяця і перший момент наступного місяця
+        bounds = []
+        day = first
+        while day.month == month:
+            bounds.append(int(day.timestamp()))
+            day += timedelta(days=1)
+        bounds.append(int(day.timestamp()))
+
+        positions = [self._snapshot.bisect(ts) for ts in bounds]
+        counts = [0] * 32
+        for d in range(len(bounds) - 1):
+            counts[d + 1] = positions[d + 1] - positions[d]
+        for ts in self._deleted.values():
+            if bounds[0] <= ts < bounds[-1]:
+                counts[bisect_left(bounds, ts + 1)] -= 1
+        for ts, _ in self._added_timeline[bisect_left(self._added_timeline, (bounds[0],)):]:
+            if ts >= bounds[-1]:
+                break
+            counts[bisect_left(bounds, ts + 1)] += 1
+
+        if not any(counts):
+            counts = _EMPTY_MONTH
+        self._month_cache[(year, month)] = counts
+        return counts
@@ -0,0 +1,159 @@
+"""Фонова служба нагадувань без інтерфейсу
+
+Приклади:
+    python reminder_daemon.py                          # сповіщення в stdout
+    python reminder_daemon.py --log reminders.log
+    python reminder_daemon.py --socket /tmp/calendar.sock
+
+До сокета можуть під'єднуватись клієнти (наприклад, застосунок Kivy
+чи `nc -U /tmp/calendar.sock`) - кожне сповіщення надсилається їм
+рядком JSON.
+"""
+import argparse
+import json
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+
+from reminder_archive import ReminderArchive, archive_path
+from reminder_engine import ReminderEngine, ThreadClock
+from reminder_profile import profiler
+from reminder_storage import STORAGE_MODES, OwnerLock, open_storage
+
+
+def format_reminder(reminder):
+    """Рядок сповіщення для людини"""
+    return f'{reminder.date} {reminder.time} {reminder.title}'
+
+
+def reminder_message(reminder):
+    """Сповіщення рядком JSON для клієнтів сокета"""
+    return json.dumps({
+        'id': reminder.id,
+        'title': reminder.title,
+        'datetime': reminder.dt.isoformat(),
+    }, ensure_ascii=False)
+
+
+class StreamOutput:
+    """Друкує сповіщення у потік (за замовчуванням stdout)"""
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def __call__(self, reminders):
+        for reminder in reminders:
+            print(format_reminder(reminder), file=self.stream, flush=True)
+
+    def close(self):
+        pass
+
+
+class LogOutput:
+    """Записує сповіщення у файл журналу через logging"""
+    def __init__(self, path):
+        self.logger = logging.getLogger('calendar.reminders')
+        self.handler = logging.FileHandler(path, encoding='utf-8')
+        self.handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+        self.logger.addHandler(self.handler)
+        self.logger.setLevel(logging.INFO)
+
+    def __call__(self, reminders):
+        for reminder in reminders:
+            self.logger.info(format_reminder(reminder))
+
+    def close(self):
+        self.logger.removeHandler(self.handler)
+        self.handler.close()
+
+
+class SocketOutput:
+    """Розсилає сповіщення всім клієнтам локального unix-сокета"""
+    def __init__(self, path):
+        self.path = path
+        if os.path.exists(path):
+            os.remove(path)
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(path)
+        self.server.listen()
+        self.clients = []
+        self.lock = threading.Lock()
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                client, _ = self.server.accept()
+            except OSError:
+                return
+            with self.lock:
+                self.clients.append(client)
+
+    def __call__(self, reminders):
+        data = ''.join(reminder_message(r) + '\n' for r in reminders).encode('utf-8')
+        with self.lock:
+            for client in list(self.clients):
+                try:
+                    client.sendall(data)
+                except OSError:
+                    # Клієнт від'єднався
+                    self.clients.remove(client)
+                    client.close()
+
+    def close(self):
+        self.server.close()
+        with self.lock:
+            for client in self.clients:
+                client.close()
+            self.clients = []
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Фонова служба нагадувань')
+    parser.add_argument('--storage', choices=sorted(STORAGE_MODES),
+                        default=os.environ.get('CALENDAR_STORAGE', 'journal'),
+                        help='режим збереження (як CALENDAR_STORAGE)')
+    parser.add_argument('--path', default='reminders.json', help='файл нагадувань')
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument('--log', metavar='FILE', help='писати сповіщення у файл журналу')
+    output.add_argument('--socket', metavar='PATH', help='розсилати сповіщення через unix-сокет')
+    args = parser.parse_args(argv)
+
+    # Файли нагадувань має лише один власник: застосунок або служба
+    lock = OwnerLock(args.path)
+    if not lock.acquire():
+        print(f'Нагадування {args.path} вже відкрито іншим процесом (pid {lock.owner()})', file=sys.stderr)
+        return 1
+
+    if args.log:
+        sink = LogOutput(args.log)
+    elif args.socket:
+        sink = SocketOutput(args.socket)
+    else:
+        sink = StreamOutput()
+
+    clock = ThreadClock()
+    engine = ReminderEngine(open_storage(args.storage, args.path), clock, sink)
+    # Той самий архів, що й у застосунку: спрацьовані нагадування не зникають
+    engine.archive = ReminderArchive(archive_path(args.path))
+    engine.load()
+    engine.start()
+
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: clock.stop())
+    try:
+        clock.run()
+    finally:
+        engine.stop()
+        profiler.flush()
+        sink.close()
+        lock.release()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,375 @@
+"""Ядро нагадувань без інтерфейсу: сховище, планувальник і збереження
+
+Модуль не імпортує Kivy, тож його можна використовувати у фоновій службі
+(reminder_daemon.py), у бенчмарку чи в тестах без дисплея.
+"""
+import heapq
+import itertools
+import threading
+import time
+
+from reminder_profile import timed
+from reminder_scheduler import ReminderScheduler
+from reminder_search import SearchIndex
+from reminder_storage import BackgroundWriter
+from reminder_store import Occurrence, ReminderStore
+
+
+def remove_expired(store, moment):
+    """Видаляє разові нагадування до moment і серії без майбутніх повторень"""
+    expired = store.between(None, moment, include_series=False) + store.expired_series(moment)
+    for reminder in expired:
+        store.remove(reminder.id)
+    return expired
+
+
+def _archived(reminders, moment):
+    """Видалені нагадування у вигляді для архіву: серії розгортаються в повторення до moment"""
+    result = []
+    for reminder in reminders:
+        if reminder.repeat is None:
+            result.append(reminder)
+        else:
+            result.extend(Occurrence(reminder, ts) for ts in reminder.repeat.between(reminder.ts, None, moment))
+    return result
+
+
+class ReminderEngine:
+    """Тримає сховище, планувальник і диск в узгодженому стані
+
+    Інтерфейс (CalendarApp чи фонова служба) лише викликає методи ядра
+    і отримує нагадування, що настали, через on_fire(reminders), а про
+    будь-яку зміну дізнається через on_change(). clock - об'єкт з
+    schedule_once/cancel: kivy.clock.Clock або ThreadClock.
+
+    Зміни записуються на диск не одразу, а одним відкладеним збереженням
+    через save_delay секунд після першої з них, тож серія змін коштує один
+    запис. flush() і stop() зберігають негайно.
+
+    Після use_background_writer() сам запис виконується в окремому потоці:
+    ядро лише знімає з сховища дані для запису, а про результат повідомляють
+    on_saved() і on_error(exception), викликані через clock.
+
+    Якщо задано archive (ReminderArchive), нагадування, що спрацювали чи
+    прострочились, переносяться в нього тим самим відкладеним збереженням,
+    а не зникають.
+    """
+    # Затримка відкладеного збереження в секундах
+    SAVE_DELAY = 0.5
+
+    def __init__(self, storage, clock, on_fire=None, now=time.time, on_change=None, save_delay=SAVE_DELAY):
+        self.storage = storage
+        self.clock = clock
+        self.on_fire = on_fire
+        self.on_change = on_change
+        self.now = now
+        self.save_delay = save_delay
+        self.on_saved = None
+        self.on_error = None
+        self.writer = None
+        self.archive = None
+        # Нагадування, що чекають на перенесення в архів
+        self._archived = []
+        self._save_event = None
+        # Помилка останнього open(): порожнє сховище замість даних з диска
+        self.load_error = None
+        # Чи були зміни, після яких варто ущільнити журнал під час stop()
+        self._compact_due = False
+        self.store = ReminderStore()
+        # Пошуковий індекс будується під час першого пошуку, якщо attach не передав готовий
+        self.index = None
+        self.scheduler = ReminderScheduler(self.store, self._fire, clock, now)
+
+    def load(self):
+        """Завантажує нагадування і прибирає прострочені"""
+        self.attach(self.open())
+
+    def open(self):
+        """Відкриває сховище і прибирає прострочені, не чіпаючи поточного стану
+
+        Безпечно викликати у фоновому потоці; результат передається в attach()
+        у потоці, що володіє ядром. Якщо прочитати дані не вдалося,
+        повертає порожнє сховище і запам'ятовує помилку в load_error.
+        """
+        self.load_error = None
+        try:
+            store = self.storage.open_store()
+            # Моменти цілі, тож ts <= now рівносильне ts < int(now) + 1
+            moment = int(self.now()) + 1
+            expired = remove_expired(store, moment)
+            if expired:
+                # Архів пишеться першим: збій між записами не втратить нагадувань
+                if self.archive is not None:
+                    self.archive.write(_archived(expired, moment))
+                self.storage.write(store.drain_changes(), store)
+        except Exception as e:
+            print(f"Помилка завантаження: {e}")
+            self.load_error = e
+            store = ReminderStore()
+        return store
+
+    def attach(self, store, index=None):
+        """Робить store поточним сховищем ядра
+
+        index - готовий SearchIndex для store (наприклад, побудований у
+        фоновому потоці разом з open()).
+        """
+        self.store = store
+        self.scheduler.store = store
+        self.index = index
+
+    def search(self, query, limit=50):
+        """Нагадування, у назвах яких є всі слова запиту, у порядку часу
+
+        Серія повертається найближчим майбутнім повторенням.
+        """
+        if self.index is None:
+            self.index = SearchIndex.from_store(self.store)
+        now = int(self.now())
+        result = []
+        for reminder_id in self.index.search(query, limit):
+            reminder = self.store.get(reminder_id)
+            if reminder is None:
+                continue
+            if reminder.repeat is not None:
+                ts = reminder.repeat.next_after(reminder.ts, now)
+                reminder = Occurrence(reminder, reminder.ts if ts is None else ts)
+            result.append(reminder)
+        return result
+
+    def _unindex(self, reminders):
+        if self.index is not None:
+            for reminder in reminders:
+                self.index.remove(reminder.id)
+
+    def cleanup(self):
+        """Видаляє старі нагадування"""
+        # Моменти цілі, тож ts <= now рівносильне ts < int(now) + 1
+        moment = int(self.now()) + 1
+        expired = remove_expired(self.store, moment)
+        if expired:
+            self._unindex(expired)
+            self._archive(_archived(expired, moment))
+            self._changed()
+
+    def use_background_writer(self, maxsize=8):
+        """Переносить запис на диск в окремий потік з чергою на maxsize задач"""
+        self.writer = BackgroundWriter(
+            on_done=lambda: self.clock.schedule_once(lambda dt: self._saved()),
+            on_error=self._writer_failed,
+            maxsize=maxsize
+        )
+
+    def start(self, since=None):
+        """Запускає планувальник сповіщень (since - див. ReminderScheduler.start)"""
+        self.scheduler.start(since)
+
+    def stop(self):
+        """Зупиняє планувальник, зберігає відкладені зміни і ущільнює журнал
+
+        Журнал ущільнюється лише після змін і лише якщо дані завантажились:
+        знімок порожнього сховища після помилки читання затер би файл.
+        Чекає, доки потік запису допише всі задачі.
+        """
+        self.scheduler.stop()
+        self._cancel_save()
+        try:
+            jobs = [self._prepare_archive()]
+            changes = self.store.drain_changes()
+            if changes:
+                jobs.append(self.storage.prepare(changes, self.store))
+            if self._compact_due and self.load_error is None:
+                jobs.append(self.storage.prepare_compact(self.store))
+        except Exception as e:
+            self._failed(e)
+            jobs = []
+        for job in jobs:
+            self._run(job)
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+    @timed('save_reminders')
+    def flush(self):
+        """Негайно зберігає накопичені зміни (чи ставить їх у чергу потоку запису)"""
+        self._cancel_save()
+        self._run(self._prepare_archive())
+        changes = self.store.drain_changes()
+        if not changes:
+            return
+        try:
+            job = self.storage.prepare(changes, self.store)
+        except Exception as e:
+            self._failed(e)
+            return
+        self._run(job)
+
+    def _archive(self, reminders):
+        """Відкладає перенесення нагадувань в архів до наступного збереження"""
+        if self.archive is not None:
+            self._archived.extend(reminders)
+
+    def _prepare_archive(self):
+        """Задача дописування відкладених нагадувань в архів або None"""
+        reminders, self._archived = self._archived, []
+        if not reminders:
+            return None
+        try:
+            return self.archive.prepare(reminders)
+        except Exception as e:
+            self._failed(e)
+            return None
+
+    def _run(self, job):
+        """Виконує задачу запису тут або передає її потоку запису"""
+        if job is None:
+            return
+        if self.writer is not None:
+            self.writer.submit(job)
+            return
+        try:
+            job()
+        except Exception as e:
+            self._failed(e)
+        else:
+            self._saved()
+
+    def _saved(self):
+        if self.on_saved is not None:
+            self.on_saved()
+
+    def _failed(self, error):
+        print(f"Помилка збереження: {error}")
+        if self.on_error is not None:
+            self.on_error(error)
+
+    def _writer_failed(self, error):
+        # Потік запису: друкуємо одразу (під час закриття clock може вже
+        # не працювати), а інтерфейс сповіщаємо в потоці ядра
+        print(f"Помилка збереження: {error}")
+        if self.on_error is not None:
+            self.clock.schedule_once(lambda dt: self.on_error(error))
+
+    def _changed(self):
+        """Позначає сховище зміненим: збереження відкладається, інтерфейс сповіщається"""
+        self._compact_due = True
+        if self._save_event is None:
+            self._save_event = self.clock.schedule_once(self._save_due, self.save_delay)
+        if self.on_change is not None:
+            self.on_change()
+
+    def _save_due(self, dt):
+        self._save_event = None
+        self.flush()
+
+    def _cancel_save(self):
+        if self._save_event is not None:
+            self._save_event.cancel()
+            self._save_event = None
+
+    def add(self, reminder):
+        """Додає нагадування, видаючи id, якщо його немає"""
+        self.store.add(reminder)
+        self.scheduler.add(reminder)
+        if self.index is not None:
+            self.index.add(reminder)
+        self._changed()
+        return reminder
+
+    def add_many(self, reminders):
+        """Додає пачку нагадувань"""
+        self.store.add_many(reminders)
+        self.scheduler.add_many(reminders)
+        if self.index is not None:
+            for reminder in reminders:
+                self.index.add(reminder)
+        self._changed()
+
+    def remove(self, reminder):
+        """Видаляє нагадування; для повторення серії - лише це повторення"""
+        if isinstance(reminder, Occurrence):
+            self.store.skip_occurrence(reminder.id, reminder.ts)
+        else:
+            self.store.remove(reminder.id)
+            self._unindex([reminder])
+        self.scheduler.remove(reminder.id)
+        self._changed()
+
+    def remove_series(self, series_id):
+        """Видаляє всю серію повторюваних нагадувань"""
+        self.store.remove(series_id)
+        if self.index is not None:
+            self.index.remove(series_id)
+        self.scheduler.remove(series_id)
+        self._changed()
+
+    def _fire(self, reminders):
+        """Прибирає нагадування, що настали, в архів і передає їх інтерфейсу"""
+        self._archive(reminders)
+        for reminder in reminders:
+            if isinstance(reminder, Occurrence):
+                # Серія лишається, доки в неї є наступні повторення
+                series = reminder.series
+                if series.repeat.next_after(series.ts, reminder.ts + 1) is None:
+                    self.store.remove(series.id)
+                    self._unindex([series])
+            else:
+                self.store.remove(reminder.id)
+                self._unindex([reminder])
+        self._changed()
+        if self.on_fire is not None:
+            self.on_fire(reminders)
+
+
+class ThreadClock:
+    """Годинник для планувальника поза Kivy
+
+    Таймери виконуються по черзі в потоці, що викликав run(), тож ядро
+    не потребує блокувань. schedule_once можна викликати з будь-якого потоку.
+    """
+    class Event:
+        __slots__ = ('callback', 'cancelled')
+
+        def __init__(self, callback):
+            self.callback = callback
+            self.cancelled = False
+
+        def cancel(self):
+            self.cancelled = True
+
+    def __init__(self):
+        self._heap = []
+        self._order = itertools.count()
+        self._cond = threading.Condition()
+        self._stopped = False
+
+    def schedule_once(self, callback, timeout=0):
+        """Викликає callback(dt) через timeout секунд"""
+        event = self.Event(callback)
+        with self._cond:
+            heapq.heappush(self._heap, (time.monotonic() + timeout, next(self._order), event))
+            self._cond.notify()
+        return event
+
+    def run(self):
+        """Виконує таймери, доки не викликано stop()"""
+        while True:
+            with self._cond:
+                while not self._stopped:
+                    if self._heap and self._heap[0][2].cancelled:
+                        heapq.heappop(self._heap)
+                        continue
+                    delay = self._heap[0][0] - time.monotonic() if self._heap else None
+                    if delay is not None and delay <= 0:
+                        break
+                    self._cond.wait(delay)
+                if self._stopped:
+                    return
+                due, _, event = heapq.heappop(self._heap)
+            event.callback(time.monotonic() - due)
+
+    def stop(self):
+        """Зупиняє run() після поточного таймера"""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
@@ -0,0 +1,373 @@
+"""Потоковий імпорт і експорт iCalendar (.ics)
+
+Читання і запис ідуть по одному рядку, тож пам'ять не залежить від
+розміру файлу. VEVENT стає нагадуванням: текст - SUMMARY, момент -
+спрацювання найранішого VALARM (або DTSTART, якщо нагадувань немає),
+RRULE/EXDATE - правило повторення. Під час експорту кожне нагадування
+записується подією з VALARM у момент DTSTART.
+
+Приклади:
+    python reminder_ical.py import events.ics
+    python reminder_ical.py export backup.ics --storage sqlite
+"""
+import argparse
+import os
+import re
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from reminder_import import import_batches
+from reminder_recurrence import Recurrence
+from reminder_storage import STORAGE_MODES, OwnerLock, open_storage
+from reminder_store import iter_frozen
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:  # Python < 3.9: час з TZID вважається місцевим
+    ZoneInfo = None
+
+# Найбільша довжина рядка у файлі без переносу, в октетах (RFC 5545)
+LINE_LIMIT = 75
+DURATION_RE = re.compile(
+    r'^([+-])?P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$'
+)
+# RRULE -> (частота Recurrence, множник кроку)
+FREQS = {
+    'DAILY': ('daily', 1),
+    'WEEKLY': ('weekly', 1),
+    'MONTHLY': ('monthly', 1),
+    'YEARLY': ('monthly', 12),
+}
+_zones = {}
+
+
+def unfold(lines):
+    """Склеює перенесені рядки (продовження починається з пробілу чи табуляції)"""
+    current = None
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if line[:1] in (' ', '\t') and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current:
+        yield current
+
+
+def parse_line(line):
+    """Розбирає рядок властивості на (назва, параметри, значення)"""
+    quoted = False
+    for i, char in enumerate(line):
+        if char == '"':
+            quoted = not quoted
+        elif char == ':' and not quoted:
+            head, value = line[:i], line[i + 1:]
+            break
+    else:
+        raise ValueError(f'Рядок без значення: {line[:40]}')
+
+    name, *params = head.split(';')
+    parsed = {}
+    for param in params:
+        key, _, param_value = param.partition('=')
+        parsed[key.upper()] = param_value.strip('"')
+    return name.upper(), parsed, value
+
+
+def unescape(text):
+    """Знімає екранування тексту iCalendar"""
+    return re.sub(r'\\([\\;,nN])', lambda m: '\n' if m.group(1) in 'nN' else m.group(1), text)
+
+
+def escape(text):
+    """Екранує текст для SUMMARY і DESCRIPTION"""
+    return (text.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def _zone(name):
+    if ZoneInfo is None:
+        return None
+    if name not in _zones:
+        try:
+            _zones[name] = ZoneInfo(name)
+        except Exception:
+            # Назви зон Windows та інші невідомі - як місцевий час
+            _zones[name] = None
+    return _zones[name]
+
+
+def parse_datetime(value, params):
+    """Момент DATE-TIME чи DATE як секунди епохи"""
+    value = value.strip()
+    if params.get('VALUE') == 'DATE' or len(value) == 8:
+        return int(datetime.strptime(value[:8], '%Y%m%d').timestamp())
+    dt = datetime.strptime(value.rstrip('Z')[:15], '%Y%m%dT%H%M%S')
+    if value.endswith('Z'):
+        dt = dt.replace(tzinfo=timezone.utc)
+    elif 'TZID' in params:
+        zone = _zone(params['TZID'])
+        if zone is not None:
+            dt = dt.replace(tzinfo=zone)
+    return int(dt.timestamp())
+
+
+def parse_duration(value):
+    """Тривалість iCalendar ('-PT15M', 'P1D') у секундах"""
+    match = DURATION_RE.match(value.strip())
+    if not match or not any(match.groups()[1:]):
+        raise ValueError(f'Некоректна тривалість: {value}')
+    sign, weeks, days, hours, minutes, seconds = match.groups()
+    total = timedelta(
+        weeks=int(weeks or 0), days=int(days or 0),
+        hours=int(hours or 0), minutes=int(minutes or 0), seconds=int(seconds or 0)
+    ).total_seconds()
+    return -int(total) if sign == '-' else int(total)
+
+
+def parse_rrule(value, exdates):
+    """Правило RRULE як Recurrence; ValueError для непідтримуваних правил"""
+    parts = dict(part.partition('=')[::2] for part in value.upper().split(';') if part)
+    unsupported = sorted(key for key in parts if key not in ('FREQ', 'INTERVAL', 'COUNT', 'UNTIL', 'WKST'))
+    if unsupported:
+        raise ValueError(f'Непідтримуване правило повторення: {",".join(unsupported)}')
+    if parts.get('FREQ') not in FREQS:
+        raise ValueError(f'Непідтримувана частота повторення: {parts.get("FREQ")}')
+    freq, multiplier = FREQS[parts['FREQ']]
+    try:
+        count = int(parts['COUNT']) if 'COUNT' in parts else None
+        until = parse_datetime(parts['UNTIL'], {}) if 'UNTIL' in parts else None
+        interval = int(parts.get('INTERVAL', 1))
+    except (ValueError, OverflowError, OSError):
+        raise ValueError(f'Некоректне правило повторення: {value}')
+    return Recurrence(freq, interval * multiplier, count, until, exdates)
+
+
+def _event(props, alarms, now):
+    """Перетворює властивості VEVENT на подію формату reminder_import"""
+    text = unescape(props.get('SUMMARY', ('', {}))[1]).strip()
+    line = f"VEVENT {text or props.get('UID', ('', {}))[1]}"
+    if 'DTSTART' not in props:
+        return {'line': line, 'error': 'Подія без DTSTART'}
+    if not text:
+        return {'line': line, 'error': 'Порожній текст події'}
+    try:
+        params, value = props['DTSTART']
+        start = parse_datetime(value, params)
+        offset = None
+        for params, value in alarms:
+            if params.get('VALUE') == 'DATE-TIME':
+                moment = parse_datetime(value, params) - start
+            elif params.get('RELATED') == 'END' and 'DTEND' in props:
+                end_params, end_value = props['DTEND']
+                moment = parse_datetime(end_value, end_params) - start + parse_duration(value)
+            else:
+                moment = parse_duration(value)
+            offset = moment if offset is None else min(offset, moment)
+        ts = start + (offset or 0)
+
+        repeat = None
+        if 'RRULE' in props:
+            exdates = set()
+            for params, value in props.get('EXDATE', ()):
+                exdates.update(parse_datetime(v, params) + (offset or 0) for v in value.split(','))
+            try:
+                repeat = parse_rrule(props['RRULE'][1], exdates)
+            except ValueError as e:
+                # Дата події коректна - непідтримуване саме правило
+                return {'line': line, 'error': str(e)}
+            if repeat.until is not None:
+                repeat.until += offset or 0
+    except (ValueError, OverflowError, OSError) as e:
+        return {'line': line, 'error': f'Некоректна дата: {e}'}
+
+    dt = datetime.fromtimestamp(ts)
+    event = {'line': line, 'day': dt.day, 'hour': dt.hour, 'minute': dt.minute, 'text': text}
+    if repeat is not None:
+        if repeat.next_after(ts, int(now.timestamp()) + 1) is None:
+            event['error'] = 'Серія вже закінчилась'
+            return event
+        event['repeat'] = repeat
+    elif dt <= now:
+        event['error'] = 'Минула дата'
+        return event
+    event['datetime'] = dt
+    return event
+
+
+def iter_ics_events(lines, now=None):
+    """Ліниво розбирає .ics у події формату reminder_import, по одній на VEVENT
+
+    У пам'яті тримається лише поточна подія.
+    """
+    now = now or datetime.now()
+    # Властивості поточної VEVENT: назва -> (параметри, значення); EXDATE - список
+    props = None
+    alarms = None
+    alarm = None
+    for line in unfold(lines):
+        if not line:
+            continue
+        try:
+            name, params, value = parse_line(line)
+        except ValueError as e:
+            if props is not None:
+                props['_error'] = str(e)
+            continue
+
+        if name == 'BEGIN':
+            if value.upper() == 'VEVENT':
+                props, alarms = {}, []
+            elif value.upper() == 'VALARM' and props is not None:
+                alarm = {}
+        elif name == 'END':
+            if value.upper() == 'VALARM' and alarm is not None:
+                if 'TRIGGER' in alarm:
+                    alarms.append(alarm['TRIGGER'])
+                alarm = None
+            elif value.upper() == 'VEVENT' and props is not None:
+                if '_error' in props:
+                    yield {'line': f"VEVENT {props.get('UID', ('', {}))[1]}", 'error': props['_error']}
+                else:
+                    yield _event(props, alarms, now)
+                props = alarms = alarm = None
+        elif alarm is not None:
+            if name == 'TRIGGER':
+                alarm['TRIGGER'] = (params, value)
+        elif props is not None:
+            if name == 'EXDATE':
+                props.setdefault('EXDATE', []).append((params, value))
+            elif name in ('SUMMARY', 'DTSTART', 'DTEND', 'RRULE', 'UID'):
+                props[name] = (params, value)
+
+
+def fold(line):
+    """Переносить рядок довший за LINE_LIMIT октетів, не розриваючи символів UTF-8"""
+    if len(line.encode('utf-8')) <= LINE_LIMIT:
+        return line
+    parts = []
+    current = []
+    size = 0
+    limit = LINE_LIMIT
+    for char in line:
+        width = len(char.encode('utf-8'))
+        if size + width > limit:
+            parts.append(''.join(current))
+            current, size = [], 0
+            # Рядок продовження починається з пробілу
+            limit = LINE_LIMIT - 1
+        current.append(char)
+        size += width
+    parts.append(''.join(current))
+    return '\r\n '.join(parts)
+
+
+def _local(ts):
+    """Момент як місцевий час без зони (floating), як його зберігає застосунок"""
+    return datetime.fromtimestamp(ts).strftime('%Y%m%dT%H%M%S')
+
+
+def event_lines(reminder, stamp):
+    """Рядки VEVENT для одного нагадування чи серії"""
+    title = escape(reminder.title)
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:{reminder.id}-{reminder.created or reminder.ts}@calendar',
+        f'DTSTAMP:{stamp}',
+        f'DTSTART:{_local(reminder.ts)}',
+        f'SUMMARY:{title}',
+    ]
+    repeat = reminder.repeat
+    if repeat is not None:
+        rule = f'FREQ={repeat.freq.upper()};INTERVAL={repeat.interval}'
+        if repeat.count is not None:
+            rule += f';COUNT={repeat.count}'
+        if repeat.until is not None:
+            rule += f';UNTIL={_local(repeat.until)}'
+        lines.append(f'RRULE:{rule}')
+        if repeat.exdates:
+            lines.append('EXDATE:' + ','.join(_local(ts) for ts in sorted(repeat.exdates)))
+    lines.extend([
+        'BEGIN:VALARM',
+        'ACTION:DISPLAY',
+        f'DESCRIPTION:{title}',
+        'TRIGGER:PT0S',
+        'END:VALARM',
+        'END:VEVENT',
+    ])
+    return lines
+
+
+def write_ics(reminders, f):
+    """Записує нагадування у відкритий файл подія за подією; повертає їх кількість"""
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    f.write('BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//Календар Нагадувань//UK\r\nCALSCALE:GREGORIAN\r\n')
+    count = 0
+    for reminder in reminders:
+        f.write(''.join(fold(line) + '\r\n' for line in event_lines(reminder, stamp)))
+        count += 1
+    f.write('END:VCALENDAR\r\n')
+    return count
+
+
+def export_ics(reminders, path):
+    """Записує нагадування у файл .ics атомарно (через тимчасовий файл)"""
+    tmp_path = path + '.tmp'
+    try:
+        with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+            count = write_ics(reminders, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Імпорт і експорт нагадувань у форматі iCalendar')
+    parser.add_argument('action', choices=('import', 'export'))
+    parser.add_argument('file', help='файл .ics')
+    parser.add_argument('--storage', choices=sorted(STORAGE_MODES),
+                        default=os.environ.get('CALENDAR_STORAGE', 'journal'),
+                        help='режим збереження (як CALENDAR_STORAGE)')
+    parser.add_argument('--path', default='reminders.json', help='файл нагадувань')
+    args = parser.parse_args(argv)
+
+    lock = OwnerLock(args.path)
+    if not lock.acquire():
+        print(f'Нагадування {args.path} вже відкрито іншим процесом (pid {lock.owner()})', file=sys.stderr)
+        return 1
+    try:
+        return _run(args)
+    finally:
+        lock.release()
+
+
+def _run(args):
+    storage = open_storage(args.storage, args.path)
+    store = storage.open_store()
+    if args.action == 'export':
+        count = export_ics(iter_frozen(store.freeze()), args.file)
+        print(f'Експортовано нагадувань: {count}')
+        return 0
+
+    start = time.time()
+    with open(args.file, 'r', encoding='utf-8-sig', newline='') as f:
+        # Пачки лише додаються до сховища; на диск усе потрапляє одним записом
+        # наприкінці, бо кожен запис понад compact_every переписував би весь знімок
+        added, errors, error_count, count = import_batches(
+            iter_ics_events(f), store.add_many, progress=lambda n: print(f'Оброблено подій: {n}', file=sys.stderr)
+        )
+    storage.write(store.drain_changes(), store)
+    print(f'Подій: {count}, додано: {added}, помилок: {error_count} ({time.time() - start:.1f} с)')
+    for error in errors:
+        print(f"  {error['line']} - {error['error']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
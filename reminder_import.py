@@ -0,0 +1,159 @@
+"""Потоковий розбір подій для масового імпорту"""
+import csv
+import os
+import re
+import time
+from datetime import datetime
+
+from reminder_store import Reminder
+
+# Рядок формату "дд чч подія" або "дд чч:хх подія"
+BULK_LINE_RE = re.compile(r'^(\d{1,2})\s+(\d{1,2}):?(\d{0,2})\s+(.+)$')
+
+# Через скільки рядків повідомляти про прогрес
+BATCH_SIZE = 5000
+# Скільки прикладів помилок зберігати під час потокового імпорту
+ERROR_SAMPLES = 20
+
+
+def parse_bulk_line(line, year, month, now):
+    """Розбирає один рядок "дд чч подія" у подію або запис про помилку"""
+    match = BULK_LINE_RE.match(line)
+    if not match:
+        return {'line': line, 'error': 'Неправильний формат'}
+
+    day = int(match.group(1))
+    hour = int(match.group(2))
+    minute = int(match.group(3)) if match.group(3) else 0
+    event_text = match.group(4).strip()
+
+    try:
+        date_obj = datetime(year, month, day, hour, minute)
+    except ValueError as e:
+        return {'line': line, 'error': f'Некоректна дата: {str(e)}'}
+
+    return _check_future(line, date_obj, event_text, now)
+
+
+def parse_csv_row(row, now):
+    """Розбирає рядок CSV: дата (дд.мм.рррр або рррр-мм-дд), час (гг:хх), текст"""
+    line = ','.join(row)
+    if len(row) < 3:
+        return {'line': line, 'error': 'Неправильний формат'}
+
+    date_text, time_text, event_text = row[0].strip(), row[1].strip(), ','.join(row[2:]).strip()
+    date_format = '%Y-%m-%d' if '-' in date_text else '%d.%m.%Y'
+    try:
+        date_obj = datetime.strptime(f'{date_text} {time_text}', f'{date_format} %H:%M')
+    except ValueError as e:
+        return {'line': line, 'error': f'Некоректна дата: {str(e)}'}
+    if not event_text:
+        return {'line': line, 'error': 'Порожній текст події'}
+
+    return _check_future(line, date_obj, event_text, now)
+
+
+def _check_future(line, date_obj, event_text, now):
+    """Перевіряє, що подія в майбутньому"""
+    event = {
+        'line': line,
+        'day': date_obj.day,
+        'hour': date_obj.hour,
+        'minute': date_obj.minute,
+        'text': event_text,
+    }
+    if date_obj > now:
+        event['datetime'] = date_obj
+    else:
+        event['error'] = 'Минула дата'
+    return event
+
+
+def iter_bulk_events(lines, year, month, now=None):
+    """Ліниво розбирає рядки формату "дд чч подія" за вказаний місяць"""
+    now = now or datetime.now()
+    for line in lines:
+        line = line.strip()
+        if line:
+            yield parse_bulk_line(line, year, month, now)
+
+
+def iter_csv_events(lines, now=None):
+    """Ліниво розбирає CSV; рядок заголовка (date/дата) пропускається"""
+    now = now or datetime.now()
+    for row in csv.reader(lines):
+        if not row or not any(cell.strip() for cell in row):
+            continue
+        if row[0].strip().lower() in ('date', 'дата'):
+            continue
+        yield parse_csv_row(row, now)
+
+
+def iter_file_events(path, year, month, now=None):
+    """Читає події з файлу рядок за рядком; формат визначається розширенням"""
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        if extension == '.csv':
+            yield from iter_csv_events(f, now)
+        elif extension == '.ics':
+            from reminder_ical import iter_ics_events
+            yield from iter_ics_events(f, now)
+        else:
+            yield from iter_bulk_events(f, year, month, now)
+
+
+def collect_reminders(events, progress=None, batch_size=BATCH_SIZE):
+    """Перетворює потік подій на записи нагадувань
+
+    Повертає (нагадування, помилки, кількість рядків). progress(n)
+    викликається після кожних batch_size рядків.
+    """
+    reminders = []
+    errors = []
+    created = int(time.time())
+    count = 0
+    for count, event in enumerate(events, 1):
+        if 'error' in event:
+            errors.append(event)
+        else:
+            reminders.append(event_reminder(event, created))
+        if progress is not None and count % batch_size == 0:
+            progress(count)
+    return reminders, errors, count
+
+
+def event_reminder(event, created):
+    """Нагадування для коректної події; id видасть сховище під час додавання"""
+    return Reminder(None, event['text'], int(event['datetime'].timestamp()), created, event.get('repeat'))
+
+
+def import_batches(events, commit, progress=None, batch_size=BATCH_SIZE, error_samples=ERROR_SAMPLES):
+    """Передає нагадування з потоку подій у commit(пачка) по batch_size штук
+
+    На відміну від collect_reminders не накопичує ні нагадувань, ні всіх
+    помилок, тож пам'ять не залежить від розміру файлу. Повертає (додано,
+    перші error_samples помилок, кількість помилок, кількість подій).
+    """
+    batch = []
+    errors = []
+    error_count = 0
+    added = 0
+    created = int(time.time())
+    count = 0
+    for count, event in enumerate(events, 1):
+        if 'error' in event:
+            error_count += 1
+            if len(errors) < error_samples:
+                errors.append(event)
+        else:
+            batch.append(event_reminder(event, created))
+            if len(batch) >= batch_size:
+                commit(batch)
+                added += len(batch)
+                batch = []
+        if progress is not None and count % batch_size == 0:
+            progress(count)
+    if batch:
+        commit(batch)
+        added += len(batch)
+    return added, errors, error_count, count
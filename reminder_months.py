@@ -0,0 +1,90 @@
+"""Обчислені моделі місяців для сітки календаря з LRU-кешем"""
+import calendar
+from collections import OrderedDict
+from datetime import date
+
+
+class MonthModel:
+    """Усе, що потрібно сітці календаря для одного місяця
+
+    dates - 42 клітинки (6 тижнів по 7 днів): дата дня або None для
+    клітинок поза місяцем; counts - кількість нагадувань по днях;
+    today_index - номер клітинки сьогоднішнього дня або -1.
+    """
+    __slots__ = ('year', 'month', 'dates', 'counts', 'today', 'today_index', 'source', 'revision')
+
+    def __init__(self, year, month, dates, counts, today, source, revision):
+        self.year = year
+        self.month = month
+        self.dates = dates
+        self.counts = counts
+        self.today = today
+        self.today_index = dates.index(today) if today in dates else -1
+        self.source = source
+        self.revision = revision
+
+    @classmethod
+    def build(cls, source, year, month, today):
+        """Обчислює модель місяця за лічильниками source (сховища чи підсумку)"""
+        first_weekday, days_in_month = calendar.monthrange(year, month)
+        dates = [None] * 42
+        for day in range(1, days_in_month + 1):
+            dates[first_weekday + day - 1] = date(year, month, day)
+        counts = tuple(source.month_counts(year, month))
+        return cls(year, month, dates, counts, today, source, source.month_revision(year, month))
+
+    def is_current(self, source, today):
+        """Чи модель досі відповідає source і сьогоднішній даті"""
+        return (self.source is source and self.today == today
+                and self.revision == source.month_revision(self.year, self.month))
+
+
+class MonthCache:
+    """LRU-кеш моделей місяців за ключем (рік, місяць)
+
+    Модель перевіряється за номером зміни місяця в сховищі, тож після
+    зміни нагадування обчислюється заново лише його місяць; зміна серії,
+    підміна сховища чи новий день роблять застарілими всі моделі.
+    """
+    # Скільки місяців тримати в кеші
+    CAPACITY = 24
+
+    def __init__(self, capacity=CAPACITY):
+        self.capacity = capacity
+        self._models = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._models)
+
+    def get(self, source, year, month, today):
+        """Модель місяця з кешу або щойно обчислена"""
+        key = (year, month)
+        model = self._models.get(key)
+        if model is not None and model.is_current(source, today):
+            self._models.move_to_end(key)
+            self.hits += 1
+            return model
+
+        self.misses += 1
+        model = MonthModel.build(source, year, month, today)
+        self._models[key] = model
+        self._models.move_to_end(key)
+        while len(self._models) > self.capacity:
+            self._models.popitem(last=False)
+        return model
+
+    def prefetch(self, source, year, month, today, span=1):
+        """Обчислює span місяців до і після (рік, місяць), яких ще немає в кеші"""
+        index = year * 12 + month - 1
+        for offset in range(1, span + 1):
+            for near in (index + offset, index - offset):
+                key = (near // 12, near % 12 + 1)
+                model = self._models.get(key)
+                if model is None or not model.is_current(source, today):
+                    self.get(source, key[0], key[1], today)
+
+    def clear(self):
+        """Забуває всі моделі"""
+        self._models.clear()
@@ -0,0 +1,311 @@
+"""Розсилка сповіщень у кілька каналів з групуванням і повторними спробами
+
+Нагадування, що настали майже одночасно, збираються в одне групове
+сповіщення (список нагадувань). Кожен канал (sink) має власний потік
+і обмежену чергу: повільний чи недоступний канал не затримує ні
+інтерфейс, ні інші канали. Невдала доставка повторюється з паузою, що
+зростає, а коли черга заповнена, найстаріше сповіщення відкидається.
+
+Канали задаються рядком на кшталт змінної CALENDAR_NOTIFY:
+    toast,desktop,log=notifications.log,webhook=http://127.0.0.1:8080/,smtp=localhost:1025
+"""
+import json
+import logging
+import platform
+import queue
+import shutil
+import smtplib
+import subprocess
+import threading
+import time
+import urllib.request
+from email.message import EmailMessage
+
+# Скільки назв показувати в груповому сповіщенні
+SHOWN_TITLES = 5
+
+
+def batch_title(reminders):
+    """Заголовок групового сповіщення"""
+    if len(reminders) == 1:
+        return 'Нагадування'
+    return f'Нагадувань: {len(reminders)}'
+
+
+def batch_text(reminders, shown=SHOWN_TITLES):
+    """Текст групового сповіщення: час і назва кожного, решта - числом"""
+    lines = [f'{r.time} {r.title}' for r in reminders[:shown]]
+    if len(reminders) > shown:
+        lines.append(f'і ще {len(reminders) - shown}')
+    return '\n'.join(lines)
+
+
+def batch_records(reminders):
+    """Групове сповіщення простими словниками для JSON"""
+    return [
+        {'id': r.id, 'title': r.title, 'datetime': r.dt.isoformat()}
+        for r in reminders
+    ]
+
+
+class CallbackSink:
+    """Передає групу нагадувань у функцію (наприклад, у чергу тостів застосунку)"""
+    name = 'toast'
+
+    def __init__(self, callback):
+        self.callback = callback
+
+    def send(self, reminders):
+        self.callback(reminders)
+
+
+class LogSink:
+    """Записує кожне нагадування групи у файл журналу"""
+    name = 'log'
+
+    def __init__(self, path):
+        self.logger = logging.getLogger(f'calendar.notify.{path}')
+        self.logger.propagate = False
+        self.handler = logging.FileHandler(path, encoding='utf-8')
+        self.handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+        self.logger.addHandler(self.handler)
+        self.logger.setLevel(logging.INFO)
+
+    def send(self, reminders):
+        for r in reminders:
+            self.logger.info(f'{r.date} {r.time} {r.title}')
+
+    def close(self):
+        self.logger.removeHandler(self.handler)
+        self.handler.close()
+
+
+class DesktopSink:
+    """Сповіщення робочого столу через notify-send (Linux) чи osascript (macOS)"""
+    name = 'desktop'
+
+    def __init__(self):
+        system = platform.system()
+        if system == 'Darwin':
+            self.command = shutil.which('osascript')
+        elif system == 'Linux':
+            self.command = shutil.which('notify-send')
+        else:
+            self.command = None
+        if self.command is None:
+            raise ValueError('Сповіщення робочого столу недоступні в цій системі')
+
+    def send(self, reminders):
+        title, text = batch_title(reminders), batch_text(reminders)
+        if self.command.endswith('osascript'):
+            script = f'display notification {json.dumps(text)} with title {json.dumps(title)}'
+            args = [self.command, '-e', script]
+        else:
+            args = [self.command, '--app-name=Календар', title, text]
+        subprocess.run(args, check=True, timeout=10, capture_output=True)
+
+
+class WebhookSink:
+    """Надсилає групу нагадувань POST-запитом з тілом JSON"""
+    name = 'webhook'
+
+    def __init__(self, url, timeout=10):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, reminders):
+        body = json.dumps({'reminders': batch_records(reminders)}, ensure_ascii=False).encode('utf-8')
+        request = urllib.request.Request(
+            self.url, data=body, headers={'Content-Type': 'application/json'}, method='POST'
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+class SmtpSink:
+    """Надсилає групу нагадувань листом через SMTP (наприклад, локальний тестовий сервер)"""
+    name = 'smtp'
+
+    def __init__(self, host='localhost', port=25, sender='calendar@localhost', to='calendar@localhost', timeout=10):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.to = to
+        self.timeout = timeout
+
+    def send(self, reminders):
+        message = EmailMessage()
+        message['Subject'] = batch_title(reminders)
+        message['From'] = self.sender
+        message['To'] = self.to
+        message.set_content(batch_text(reminders, shown=len(reminders)))
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            smtp.send_message(message)
+
+
+class SinkWorker:
+    """Потік одного каналу з обмеженою чергою і повторними спробами
+
+    Після stop() потік доставляє те, що вже в черзі, без повторних спроб,
+    і сам закриває канал (close(), якщо він є) - вже після останнього send.
+    """
+    def __init__(self, sink, maxsize, retries, backoff):
+        self.sink = sink
+        self.retries = retries
+        self.backoff = backoff
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize)
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, reminders):
+        """Ставить групу в чергу; коли черга повна, відкидає найстарішу"""
+        while True:
+            try:
+                self._queue.put_nowait(reminders)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self._queue.task_done()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def stop(self):
+        """Просить потік завершитись, не чекаючи на нього"""
+        self._stopped.set()
+        self.submit(None)
+
+    def join(self, timeout=None):
+        """Чекає на потік не довше timeout секунд; True, якщо він завершився"""
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def close(self, timeout=None):
+        """Доставляє те, що вже в черзі, і зупиняє потік"""
+        self.stop()
+        return self.join(timeout)
+
+    def _run(self):
+        try:
+            while True:
+                reminders = self._queue.get()
+                try:
+                    if reminders is None:
+                        return
+                    self._deliver(reminders)
+                finally:
+                    self._queue.task_done()
+        finally:
+            close = getattr(self.sink, 'close', None)
+            if close is not None:
+                close()
+
+    def _deliver(self, reminders):
+        for attempt in range(self.retries + 1):
+            try:
+                self.sink.send(reminders)
+            except Exception as e:
+                error = e
+                # Пауза перед повтором переривається закриттям - тоді повторів більше немає
+                if attempt < self.retries and not self._stopped.wait(self.backoff * 2 ** attempt):
+                    continue
+                break
+            else:
+                self.sent += 1
+                return
+        self.failed += 1
+        print(f"Помилка сповіщення ({self.sink.name}): {error}")
+
+
+class NotificationDispatcher:
+    """Групує нагадування і розсилає їх усім каналам паралельно
+
+    notify(reminders) можна викликати з будь-якого потоку, він не чекає
+    на доставку. Нагадування, що надійшли протягом batch_delay секунд,
+    потрапляють в одне групове сповіщення.
+    """
+    BATCH_DELAY = 0.5
+    QUEUE_SIZE = 32
+    RETRIES = 3
+    BACKOFF = 1.0
+
+    def __init__(self, sinks, batch_delay=BATCH_DELAY, queue_size=QUEUE_SIZE, retries=RETRIES, backoff=BACKOFF):
+        self.batch_delay = batch_delay
+        self.workers = [SinkWorker(sink, queue_size, retries, backoff) for sink in sinks]
+        self._pending = []
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def notify(self, reminders):
+        """Додає нагадування до групи, що буде розіслана через batch_delay"""
+        if not reminders or not self.workers:
+            return
+        with self._lock:
+            self._pending.extend(reminders)
+            if self._timer is None:
+                self._timer = threading.Timer(self.batch_delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Негайно розсилає накопичену групу"""
+        with self._lock:
+            reminders, self._pending = self._pending, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not reminders:
+            return
+        reminders.sort(key=lambda r: r.ts)
+        for worker in self.workers:
+            worker.submit(reminders)
+
+    def close(self, timeout=5):
+        """Розсилає накопичене і чекає на всі канали разом не довше timeout секунд
+
+        Канал, що не встиг, лишається у своєму потоці (він демонічний) і
+        закриється сам, коли завершить доставку.
+        """
+        self.flush()
+        for worker in self.workers:
+            worker.stop()
+        deadline = time.monotonic() + timeout
+        for worker in self.workers:
+            worker.join(max(deadline - time.monotonic(), 0))
+
+
+def sinks_from_spec(spec, toast=None):
+    """Канали з рядка 'toast,desktop,log=файл,webhook=url,smtp=хост:порт[:кому]'
+
+    toast - функція для каналу toast; недоступні канали пропускаються з
+    повідомленням.
+    """
+    sinks = []
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, arg = item.partition('=')
+        try:
+            if name == 'toast':
+                if toast is not None:
+                    sinks.append(CallbackSink(toast))
+            elif name == 'desktop':
+                sinks.append(DesktopSink())
+            elif name == 'log':
+                sinks.append(LogSink(arg or 'notifications.log'))
+            elif name == 'webhook':
+                if not arg:
+                    raise ValueError('Не вказано адресу webhook')
+                sinks.append(WebhookSink(arg))
+            elif name == 'smtp':
+                host, _, rest = (arg or 'localhost').partition(':')
+                port, _, to = rest.partition(':')
+                sinks.append(SmtpSink(host, int(port or 25), to=to or 'calendar@localhost'))
+            else:
+                raise ValueError(f'Невідомий канал сповіщень: {name}')
+        except (ValueError, OSError) as e:
+            print(f"Канал сповіщень {name} вимкнено: {e}")
+    return sinks
@@ -0,0 +1,142 @@
+"""Необов'язкові заміри гарячих шляхів: проміжки часу, лічильники і кадри
+
+Вмикається змінною оточення CALENDAR_PROFILE: '1' - запис у
+calendar_profile.jsonl, будь-яке інше значення - шлях до файлу.
+Без неї timed() повертає функцію без змін, а count() і frame()
+лише перевіряють прапорець, тож вимкнені заміри нічого не коштують.
+
+Файл - рядки JSON: {"span": назва, "ms": тривалість, "t": час початку}
+для кожного проміжку і {"summary": {...}} з підсумком при кожному flush().
+"""
+import functools
+import json
+import os
+import threading
+import time
+
+PROFILE_ENV = os.environ.get('CALENDAR_PROFILE', '')
+DEFAULT_PATH = 'calendar_profile.jsonl'
+
+
+class Profiler:
+    """Збирає заміри з будь-якого потоку і дописує їх у файл рядками JSON"""
+    # Верхні межі кошиків гістограми тривалості кадрів, мс
+    FRAME_BUCKETS = (8, 16, 33, 50, 100, 250, 500)
+    # Після скількох проміжків буфер дописується у файл
+    FLUSH_EVERY = 500
+
+    def __init__(self, path=None):
+        self.path = path
+        self.enabled = path is not None
+        self._lock = threading.Lock()
+        # назва -> [кількість, сума мс, максимум мс]
+        self.spans = {}
+        self.counters = {}
+        self.frames = [0] * (len(self.FRAME_BUCKETS) + 1)
+        self._events = []
+
+    def record(self, name, start, elapsed):
+        """Додає проміжок name, що почався в start (time.time()) і тривав elapsed секунд"""
+        ms = elapsed * 1000
+        with self._lock:
+            stats = self.spans.get(name)
+            if stats is None:
+                stats = self.spans[name] = [0, 0.0, 0.0]
+            stats[0] += 1
+            stats[1] += ms
+            if ms > stats[2]:
+                stats[2] = ms
+            self._events.append({'span': name, 'ms': round(ms, 3), 't': round(start, 3)})
+            full = len(self._events) >= self.FLUSH_EVERY
+        if full:
+            self.flush(summary=False)
+
+    def count(self, name, n=1):
+        """Збільшує лічильник name на n"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def frame(self, dt):
+        """Додає тривалість кадру dt (секунди) до гістограми"""
+        if not self.enabled:
+            return
+        ms = dt * 1000
+        for i, limit in enumerate(self.FRAME_BUCKETS):
+            if ms <= limit:
+                break
+        else:
+            i = len(self.FRAME_BUCKETS)
+        with self._lock:
+            self.frames[i] += 1
+
+    def summary(self):
+        """Підсумок: проміжки, лічильники й гістограма кадрів"""
+        with self._lock:
+            spans = {
+                name: {'count': count, 'total_ms': round(total, 3),
+                       'avg_ms': round(total / count, 3), 'max_ms': round(peak, 3)}
+                for name, (count, total, peak) in self.spans.items()
+            }
+            labels = [f'<={limit}' for limit in self.FRAME_BUCKETS]
+            labels.append(f'>{self.FRAME_BUCKETS[-1]}')
+            return {
+                'spans': spans,
+                'counters': dict(self.counters),
+                'frames_ms': dict(zip(labels, self.frames)),
+            }
+
+    def flush(self, summary=True):
+        """Дописує накопичені проміжки (і підсумок) у файл"""
+        if not self.enabled:
+            return
+        with self._lock:
+            events, self._events = self._events, []
+        if summary:
+            events.append({'summary': self.summary(), 't': round(time.time(), 3)})
+        if not events:
+            return
+        try:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(''.join(json.dumps(e, ensure_ascii=False, separators=(',', ':')) + '\n' for e in events))
+        except OSError as e:
+            print(f"Помилка запису замірів: {e}")
+
+    def report(self):
+        """Короткий текстовий підсумок для накладки на екрані"""
+        data = self.summary()
+        lines = [
+            f"{name}: {s['count']}x avg {s['avg_ms']:.1f} max {s['max_ms']:.1f} мс"
+            for name, s in sorted(data['spans'].items())
+        ]
+        lines.extend(f'{name}: {value}' for name, value in sorted(data['counters'].items()))
+        lines.append('кадри, мс: ' + ' '.join(f'{k}:{v}' for k, v in data['frames_ms'].items() if v))
+        return '\n'.join(lines)
+
+
+profiler = Profiler((DEFAULT_PATH if PROFILE_ENV == '1' else PROFILE_ENV) or None)
+
+
+def timed(name):
+    """Декоратор: заміряє кожен виклик як проміжок name, якщо заміри ввімкнено"""
+    def decorate(func):
+        if not profiler.enabled:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.time()
+            begin = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profiler.record(name, start, time.perf_counter() - begin)
+        return wrapper
+    return decorate
+
+
+def count(name, n=1):
+    """Збільшує лічильник name глобального профайлера"""
+    if profiler.enabled:
+        profiler.count(name, n)
@@ -0,0 +1,100 @@
+"""Правила повторення нагадувань"""
+import calendar
+from datetime import datetime, timedelta
+
+
+class Recurrence:
+    """Правило повторення: щодня, щотижня або щомісяця з кроком interval
+
+    Серія зберігається один раз; окремі повторення обчислюються ліниво
+    лише для потрібного проміжку часу. Обмеження - кількість повторень
+    count або останній момент until (секунди епохи, включно). exdates -
+    моменти окремих видалених повторень; як і в iCalendar, вони все одно
+    враховуються в count.
+    """
+    __slots__ = ('freq', 'interval', 'count', 'until', 'exdates')
+
+    FREQS = ('daily', 'weekly', 'monthly')
+
+    def __init__(self, freq, interval=1, count=None, until=None, exdates=()):
+        if freq not in self.FREQS:
+            raise ValueError(f'Невідома частота повторення: {freq}')
+        if interval < 1:
+            raise ValueError('Крок повторення має бути додатним')
+        self.freq = freq
+        self.interval = interval
+        self.count = count
+        self.until = until
+        self.exdates = set(exdates)
+
+    def __repr__(self):
+        return f'Recurrence({self.freq!r}, interval={self.interval!r}, count={self.count!r}, until={self.until!r})'
+
+    def _nth(self, start_dt, k):
+        """k-те повторення як datetime або None, якщо такого дня в місяці немає"""
+        if self.freq == 'daily':
+            return start_dt + timedelta(days=k * self.interval)
+        if self.freq == 'weekly':
+            return start_dt + timedelta(weeks=k * self.interval)
+
+        month_index = start_dt.month - 1 + k * self.interval
+        year, month = start_dt.year + month_index // 12, month_index % 12 + 1
+        if start_dt.day > calendar.monthrange(year, month)[1]:
+            return None
+        return start_dt.replace(year=year, month=month)
+
+    def _first_index(self, start_dt, window_start):
+        """Нижня оцінка номера першого повторення, що може потрапити у вікно"""
+        if window_start is None:
+            return 0
+        target = datetime.fromtimestamp(window_start)
+        if self.freq == 'monthly':
+            months = (target.year - start_dt.year) * 12 + target.month - start_dt.month
+            return max(0, months // self.interval - 1)
+        step = self.interval * (7 if self.freq == 'weekly' else 1)
+        return max(0, (target - start_dt).days // step - 1)
+
+    def between(self, start_ts, window_start=None, window_end=None):
+        """Генерує моменти повторень серії з початком start_ts у [window_start, window_end)"""
+        start_dt = datetime.fromtimestamp(start_ts)
+        k = self._first_index(start_dt, window_start)
+        while self.count is None or k < self.count:
+            occurrence = self._nth(start_dt, k)
+            k += 1
+            if occurrence is None:
+                continue
+            ts = int(occurrence.timestamp())
+            if self.until is not None and ts > self.until:
+                return
+            if window_end is not None and ts >= window_end:
+                return
+            if (window_start is None or ts >= window_start) and ts not in self.exdates:
+                yield ts
+
+    def next_after(self, start_ts, moment):
+        """Перше повторення не раніше moment або None, якщо серія закінчилась"""
+        return next(self.between(start_ts, moment), None)
+
+    def contains(self, start_ts, ts):
+        """Чи є ts моментом одного з (невидалених) повторень"""
+        return self.next_after(start_ts, ts) == ts
+
+    def to_dict(self):
+        """Повертає словник для збереження в reminders.json"""
+        data = {'freq': self.freq, 'interval': self.interval}
+        if self.count is not None:
+            data['count'] = self.count
+        if self.until is not None:
+            data['until'] = datetime.fromtimestamp(self.until).isoformat()
+        if self.exdates:
+            data['exdates'] = [datetime.fromtimestamp(ts).isoformat() for ts in sorted(self.exdates)]
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        """Створює правило зі словника з reminders.json"""
+        until = data.get('until')
+        if until is not None:
+            until = int(datetime.fromisoformat(until).timestamp())
+        exdates = [int(datetime.fromisoformat(value).timestamp()) for value in data.get('exdates', ())]
+        return cls(data['freq'], data.get('interval', 1), data.get('count'), until, exdates)
@@ -0,0 +1,146 @@
+"""Планувальник сповіщень на основі купи"""
+import heapq
+import time
+
+from reminder_profile import timed
+
+
+class ReminderScheduler:
+    """Тримає купу найближчих нагадувань і заводить один таймер на наступне
+
+    Купа заповнюється вікнами з відсортованої шкали сховища, тому тік
+    коштує O(log n) на кожне нагадування, що настало, а не прохід по всіх.
+    Після сну системи чи стрибка годинника пропущені нагадування
+    спрацьовують на найближчому тіку.
+
+    clock - об'єкт з методом schedule_once(callback, timeout), що повертає
+    подію з методом cancel() (наприклад, kivy.clock.Clock).
+    """
+    # Скільки секунд наперед переносити зі сховища в купу
+    HORIZON = 6 * 3600
+    # Найдовший сон таймера в секундах: монотонний годинник стоїть, поки
+    # система спить, тож таймер періодично звіряється з реальним часом
+    MAX_SLEEP = 60
+
+    def __init__(self, store, on_fire, clock, now=time.time):
+        self.store = store
+        self.on_fire = on_fire
+        self.clock = clock
+        self.now = now
+        self._heap = []
+        self._window_end = None
+        self._event = None
+
+    def start(self, since=None):
+        """Будує купу з нуля і заводить таймер
+
+        Минулі разові нагадування на цей момент уже прибрані очищенням,
+        а минулі повторення серій не мають спрацьовувати заново, тож перше
+        вікно починається з поточного моменту. Якщо задано since, вікно
+        починається з нього, і нагадування з [since, зараз] спрацьовують одразу.
+        """
+        self._heap = []
+        self._window_end = int(self.now()) if since is None else int(since)
+        self._refill(self.now())
+        self._arm(self.now())
+
+    def next_wakeup(self):
+        """Момент, раніше якого планувальник нічого не видасть
+
+        Найближча подія купи або кінець поточного вікна; None, якщо
+        планувальник не запущено.
+        """
+        if self._window_end is None:
+            return None
+        heap = self._heap
+        while heap and not self._is_live(*heap[0]):
+            heapq.heappop(heap)
+        return min(heap[0][0], self._window_end) if heap else self._window_end
+
+    def stop(self):
+        """Скасовує заведений таймер"""
+        if self._event is not None:
+            self._event.cancel()
+            self._event = None
+
+    def add(self, reminder):
+        """Враховує нове нагадування і за потреби перезаводить таймер"""
+        if self._window_end is None:
+            return
+        if self._push(reminder):
+            self._arm(self.now())
+
+    def add_many(self, reminders):
+        """Враховує пачку нових нагадувань і один раз перезаводить таймер"""
+        if self._window_end is None:
+            return
+        for reminder in reminders:
+            self._push(reminder)
+        self._arm(self.now())
+
+    def _push(self, reminder):
+        """Кладе в купу моменти нагадування з поточного вікна; True, якщо щось додано"""
+        if reminder.repeat is None:
+            # Разове нагадування в минулому теж потрапляє в купу і спрацює одразу
+            if reminder.ts >= self._window_end:
+                # Потрапить у купу з наступним вікном
+                return False
+            heapq.heappush(self._heap, (reminder.ts, reminder.id))
+            return True
+
+        pushed = False
+        for occurrence in self.store.occurrences(reminder, int(self.now()), self._window_end):
+            heapq.heappush(self._heap, (occurrence.ts, occurrence.id))
+            pushed = True
+        return pushed
+
+    def remove(self, reminder_id):
+        """Перезаводить таймер, якщо видалено найближче нагадування"""
+        if self._heap and self._heap[0][1] == reminder_id:
+            self._arm(self.now())
+
+    def _refill(self, now):
+        """Переносить у купу нагадування наступного вікна"""
+        end = now + self.HORIZON
+        for reminder in self.store.between(self._window_end, end):
+            heapq.heappush(self._heap, (reminder.ts, reminder.id))
+        self._window_end = end
+
+    def _is_live(self, key, reminder_id):
+        return self.store.occurrence_at(reminder_id, key) is not None
+
+    @timed('check_reminders')
+    def _tick(self, dt):
+        """Спрацьовує таймер: видає всі нагадування, час яких настав"""
+        self._event = None
+        now = self.now()
+        if now >= self._window_end:
+            self._refill(now)
+
+        due = []
+        seen = set()
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            key, reminder_id = heapq.heappop(heap)
+            if (key, reminder_id) in seen:
+                continue
+            reminder = self.store.occurrence_at(reminder_id, key)
+            if reminder is not None:
+                seen.add((key, reminder_id))
+                due.append(reminder)
+
+        if due:
+            self.on_fire(due)
+        self._arm(self.now())
+
+    def _arm(self, now):
+        """Заводить один таймер на найближчу подію"""
+        self.stop()
+        heap = self._heap
+        while heap and not self._is_live(*heap[0]):
+            heapq.heappop(heap)
+
+        delay = min(self.MAX_SLEEP, self._window_end - now)
+        if heap:
+            delay = min(delay, heap[0][0] - now)
+        self._event = self.clock.schedule_once(self._tick, max(delay, 0))
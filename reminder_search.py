@@ -0,0 +1,155 @@
+"""Повнотекстовий пошук за назвами нагадувань
+
+Інвертований індекс: слово -> множина id нагадувань. Слова зберігаються
+ще й відсортованим списком, тож усі слова з заданим префіксом - це один
+суцільний відрізок, який знаходить бінарний пошук.
+"""
+import re
+import unicodedata
+from bisect import bisect_left, insort
+
+# Слово - літери й цифри; апостроф усередині слова (м'ята, п’ять) його не розриває
+_WORD = re.compile(r"\w+(?:['’ʼ]\w+)*")
+_APOSTROPHES = str.maketrans({'’': "'", 'ʼ': "'"})
+
+
+def tokenize(text):
+    """Слова тексту без урахування регістру
+
+    casefold коректно зводить кирилицю (зокрема Ґ, Є, І, Ї) до малих літер,
+    а NFC об'єднує літери, набрані з комбінованими знаками (й, ї).
+    """
+    text = unicodedata.normalize('NFC', text).casefold().translate(_APOSTROPHES)
+    return _WORD.findall(text)
+
+
+class SearchIndex:
+    """Інвертований індекс назв нагадувань, що оновлюється поштучно"""
+    # До скількох знайдених id результати просто сортуються; більші множини
+    # перебираються за шкалою часу, доки не набереться limit
+    SORT_LIMIT = 4096
+
+    def __init__(self, reminders=()):
+        # слово -> множина id
+        self._postings = {}
+        # id -> (момент, слова назви)
+        self._entries = {}
+        for reminder in reminders:
+            self._index(reminder)
+        # Відсортовані слова для пошуку за префіксом
+        self._words = sorted(self._postings)
+        # Відсортовані (момент, id) для впорядкування великих результатів
+        self._timeline = sorted((ts, reminder_id) for reminder_id, (ts, _) in self._entries.items())
+
+    @classmethod
+    def from_store(cls, store):
+        """Індексує всі нагадування сховища"""
+        return cls(store)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _index(self, reminder):
+        """Додає нагадування до словника слів; повертає нові слова"""
+        words = set(tokenize(reminder.title))
+        self._entries[reminder.id] = (reminder.ts, words)
+        postings = self._postings
+        new_words = []
+        for word in words:
+            ids = postings.get(word)
+            if ids is None:
+                postings[word] = ids = set()
+                new_words.append(word)
+            ids.add(reminder.id)
+        return new_words
+
+    def add(self, reminder):
+        """Індексує нагадування (повторне додавання замінює попереднє)"""
+        if reminder.id in self._entries:
+            self.remove(reminder.id)
+        for word in self._index(reminder):
+            insort(self._words, word)
+        insort(self._timeline, (reminder.ts, reminder.id))
+
+    def remove(self, reminder_id):
+        """Прибирає нагадування з індексу"""
+        entry = self._entries.pop(reminder_id, None)
+        if entry is None:
+            return
+        ts, words = entry
+        timeline = self._timeline
+        del timeline[bisect_left(timeline, (ts, reminder_id))]
+        postings = self._postings
+        for word in words:
+            ids = postings[word]
+            ids.discard(reminder_id)
+            if not ids:
+                del postings[word]
+                del self._words[bisect_left(self._words, word)]
+
+    def _range(self, prefix):
+        """Відрізок self._words зі словами, що починаються з prefix"""
+        words = self._words
+        i = bisect_left(words, prefix)
+        return i, bisect_left(words, prefix + '\U0010ffff', i)
+
+    def _size(self, start, end, bound):
+        """Кількість id у відрізку слів, але не більше ніж bound"""
+        size = 0
+        for word in self._words[start:end]:
+            size += len(self._postings[word])
+            if size >= bound:
+                break
+        return size
+
+    def search(self, query, limit=50):
+        """id нагадувань, у назвах яких є всі слова запиту (як префікси)
+
+        Результати впорядковано за часом; повертається не більше limit.
+        """
+        prefixes = set(tokenize(query))
+        if not prefixes:
+            return []
+        ranges = {prefix: self._range(prefix) for prefix in prefixes}
+
+        # Множину id будуємо лише для найвужчого префікса; префікси з меншою
+        # кількістю слів рахуємо першими, щоб раніше обмежити підрахунок решти
+        best = None
+        best_size = len(self._entries) + 1
+        for prefix, (start, end) in sorted(ranges.items(), key=lambda item: item[1][1] - item[1][0]):
+            size = self._size(start, end, best_size)
+            if size < best_size:
+                best, best_size = prefix, size
+        if not best_size:
+            return []
+        start, end = ranges.pop(best)
+        words = self._words
+        if end - start == 1:
+            ids = self._postings[words[start]]
+        else:
+            ids = set()
+            for word in words[start:end]:
+                ids.update(self._postings[word])
+
+        # Решту префіксів перевіряємо по словах кандидатів
+        entries = self._entries
+        for prefix, (start, end) in ranges.items():
+            if end - start == 1:
+                ids = ids & self._postings[words[start]]
+            else:
+                ids = {
+                    reminder_id for reminder_id in ids
+                    if any(word.startswith(prefix) for word in entries[reminder_id][1])
+                }
+            if not ids:
+                return []
+
+        if len(ids) <= self.SORT_LIMIT:
+            return sorted(ids, key=lambda reminder_id: (entries[reminder_id][0], reminder_id))[:limit]
+        result = []
+        for _, reminder_id in self._timeline:
+            if reminder_id in ids:
+                result.append(reminder_id)
+                if len(result) == limit:
+                    break
+        return result
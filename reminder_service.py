@@ -0,0 +1,451 @@
+"""Служба нагадувань для багатьох календарів в одному процесі asyncio
+
+Приклади:
+    python reminder_service.py --root tenants --socket /tmp/calendars.sock
+    python reminder_service.py --root tenants --socket /tmp/calendars.sock --max-loaded 500
+
+Кожен календар (орендар) зберігається у власній теці <root>/<назва>/ у
+тому самому форматі, що й reminders.json застосунку. Усі орендарі
+ділять один таймер; у пам'яті тримаються лише max-loaded нещодавно
+використаних, решта вивантажуються і завантажуються знову під час
+запиту або коли настає час їхнього найближчого нагадування.
+
+Протокол - рядки JSON через unix-сокет, одна відповідь на кожен запит:
+    {"op": "add", "tenant": "anna", "reminder": {"title": "...", "datetime": "2026-11-03T10:00:00"}}
+    {"op": "delete", "tenant": "anna", "id": 5}
+    {"op": "month", "tenant": "anna", "year": 2026, "month": 11}
+    {"op": "subscribe", "tenant": "anna"}    # без tenant - усі орендарі
+Після subscribe з'єднання отримує рядок {"tenant": ..., "id": ..., "title": ...,
+"datetime": ...} на кожне сповіщення. Відповідь: {"ok": true, ...} або
+{"ok": false, "error": "..."}.
+"""
+import argparse
+import asyncio
+import heapq
+import itertools
+import json
+import math
+import os
+import re
+import signal
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from reminder_archive import ReminderArchive, archive_path
+from reminder_engine import ReminderEngine, ThreadClock, _archived, remove_expired
+from reminder_profile import profiler
+from reminder_scheduler import ReminderScheduler
+from reminder_storage import STORAGE_MODES, BackgroundWriter, open_storage
+from reminder_store import Reminder
+
+TENANT_NAME = re.compile(r'^[A-Za-z0-9_.-]{1,64}$')
+
+
+class SharedClock:
+    """Один таймер asyncio на всіх орендарів з інтерфейсом kivy.clock.Clock
+
+    Моменти округлюються вгору до RESOLUTION секунд, тож усі події однієї
+    секунди обслуговуються одним пробудженням. Використовується реальний
+    час, а сон обмежено MAX_SLEEP, тож після сну системи пропущені події
+    виконуються на найближчому пробудженні. schedule_once можна
+    викликати з будь-якого потоку.
+    """
+    RESOLUTION = 1
+    MAX_SLEEP = 60
+
+    def __init__(self, loop):
+        self.loop = loop
+        self._heap = []
+        self._order = itertools.count()
+        self._lock = threading.Lock()
+        self._wakeup = asyncio.Event()
+        self._next_due = None
+        self._stopped = False
+        self.wakeups = 0
+
+    def __len__(self):
+        return len(self._heap)
+
+    def schedule_once(self, callback, timeout=0):
+        """Викликає callback(dt) через timeout секунд"""
+        due = math.ceil((time.time() + timeout) / self.RESOLUTION) * self.RESOLUTION
+        event = ThreadClock.Event(callback)
+        with self._lock:
+            heapq.heappush(self._heap, (due, next(self._order), event))
+            earlier = self._next_due is None or due < self._next_due
+        if earlier:
+            self.loop.call_soon_threadsafe(self._wakeup.set)
+        return event
+
+    async def run(self):
+        """Виконує події, доки не викликано stop()"""
+        while not self._stopped:
+            now = time.time()
+            due_events = []
+            with self._lock:
+                heap = self._heap
+                while heap and (heap[0][2].cancelled or heap[0][0] <= now):
+                    due, _, event = heapq.heappop(heap)
+                    if not event.cancelled:
+                        due_events.append((due, event))
+                self._next_due = heap[0][0] if heap else None
+            for due, event in due_events:
+                try:
+                    event.callback(now - due)
+                except Exception as e:
+                    print(f"Помилка таймера: {e}")
+            if due_events:
+                # Події могли завести нові таймери на цю ж секунду
+                continue
+
+            delay = self.MAX_SLEEP if self._next_due is None else min(self.MAX_SLEEP, self._next_due - now)
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), max(delay, 0))
+            except asyncio.TimeoutError:
+                pass
+            self.wakeups += 1
+
+    def stop(self):
+        """Зупиняє run() після поточних подій"""
+        self._stopped = True
+        self.loop.call_soon_threadsafe(self._wakeup.set)
+
+
+class Tenant:
+    """Календар одного орендаря: ядро в пам'яті або лише момент пробудження"""
+    __slots__ = ('name', 'storage', 'engine', 'resume_from', 'wake_event', 'loading', 'pins')
+
+    def __init__(self, name, storage, resume_from):
+        self.name = name
+        self.storage = storage
+        self.engine = None
+        # Нагадування раніше цього моменту вже спрацювали або прострочені
+        self.resume_from = resume_from
+        self.wake_event = None
+        self.loading = None
+        # Скільки запитів чекають на завантаження; такого орендаря не вивантажують
+        self.pins = 0
+
+
+def open_tenant_store(storage, since):
+    """Відкриває сховище й архів орендаря і переносить в архів нагадування раніше since
+
+    Виконується в потоці запису: так читання йде після всіх ще не записаних
+    змін цього орендаря і не перетинається з іншими записами в його журнал.
+    Повертає (сховище, архів).
+    """
+    store = storage.open_store()
+    archive = ReminderArchive(archive_path(storage.path))
+    expired = remove_expired(store, since)
+    if expired:
+        # Архів пишеться першим: збій між записами не втратить нагадувань
+        archive.write(_archived(expired, since))
+        storage.write(store.drain_changes(), store)
+    return store, archive
+
+
+class ReminderService:
+    """Тримає багато незалежних календарів зі спільним таймером і потоком запису
+
+    Завантажені орендарі впорядковані за останнім використанням; коли їх
+    більше за max_loaded, найдавніший зберігає зміни і вивантажується, а
+    в таймері лишається одна подія - на його найближче нагадування.
+    """
+    MAX_LOADED = 256
+
+    def __init__(self, root, clock, storage_mode='journal', max_loaded=MAX_LOADED):
+        self.root = root
+        self.clock = clock
+        self.storage_mode = storage_mode
+        self.max_loaded = max_loaded
+        self.tenants = {}
+        # Завантажені орендарі: назва -> Tenant, від найдавніше використаного
+        self.loaded = OrderedDict()
+        self.writer = BackgroundWriter(
+            on_error=lambda e: print(f"Помилка збереження: {e}"), maxsize=max(8, max_loaded)
+        )
+        # Підписники: назва орендаря (None - усі) -> множина StreamWriter
+        self.subscribers = {}
+
+    def tenant(self, name):
+        """Орендар за назвою; ValueError для неприпустимої назви"""
+        if not isinstance(name, str) or not TENANT_NAME.match(name) or name in ('.', '..'):
+            raise ValueError(f'Неприпустима назва календаря: {name!r}')
+        tenant = self.tenants.get(name)
+        if tenant is None:
+            directory = os.path.join(self.root, name)
+            os.makedirs(directory, exist_ok=True)
+            storage = open_storage(self.storage_mode, os.path.join(directory, 'reminders.json'))
+            tenant = self.tenants[name] = Tenant(name, storage, int(time.time()) + 1)
+        return tenant
+
+    async def engine(self, name):
+        """Ядро орендаря, завантажене за потреби
+
+        Повертає лише ядро, яке зараз належить орендарю: користуватися ним
+        треба без await між отриманням і зміною.
+        """
+        tenant = self.tenant(name)
+        tenant.pins += 1
+        try:
+            while tenant.engine is None:
+                if tenant.loading is None:
+                    # Завантаження належить орендарю, а не запиту: скасований клієнт
+                    # не скасовує його і не дає почати друге паралельно
+                    tenant.loading = asyncio.ensure_future(self._load(tenant))
+                    tenant.loading.add_done_callback(lambda task: self._load_finished(tenant, task))
+                # Поки запит чекав, ядро могли вже вивантажити - тоді завантажуємо знову
+                await asyncio.shield(tenant.loading)
+        finally:
+            tenant.pins -= 1
+        self.loaded.move_to_end(name)
+        return tenant.engine
+
+    def _load_finished(self, tenant, task):
+        tenant.loading = None
+        if not task.cancelled():
+            # Помилку отримують клієнти, що чекали; виклик позначає її обробленою,
+            # навіть якщо всі вони вже від'єднались
+            task.exception()
+
+    async def _in_writer(self, func, *args):
+        """Виконує func(*args) у потоці запису після всіх уже поставлених задач"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def settle(result, error):
+            if future.cancelled():
+                return
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+        def job():
+            try:
+                result = func(*args)
+            except Exception as e:
+                loop.call_soon_threadsafe(settle, None, e)
+            else:
+                loop.call_soon_threadsafe(settle, result, None)
+
+        # Коли черга запису заповнена, submit чекає - не в потоці циклу
+        await loop.run_in_executor(None, self.writer.submit, job)
+        return await future
+
+    async def _load(self, tenant):
+        since = tenant.resume_from
+        store, archive = await self._in_writer(open_tenant_store, tenant.storage, since)
+
+        engine = ReminderEngine(
+            tenant.storage, self.clock,
+            on_fire=lambda reminders: self._fired(tenant.name, reminders)
+        )
+        # Спільний таймер сам звіряється з реальним часом, тож окремим
+        # орендарям не потрібні щохвилинні пробудження
+        engine.scheduler.MAX_SLEEP = ReminderScheduler.HORIZON
+        engine.writer = self.writer
+        engine.archive = archive
+        engine.attach(store)
+        if tenant.wake_event is not None:
+            tenant.wake_event.cancel()
+            tenant.wake_event = None
+        engine.start(since)
+
+        tenant.engine = engine
+        self.loaded[tenant.name] = tenant
+        self._evict()
+        return engine
+
+    async def discover(self):
+        """Завантажує всі календарі з root, щоб завести їхні пробудження
+
+        Понад max_loaded вони одразу вивантажуються, лишаючи в таймері
+        лише момент найближчого нагадування.
+        """
+        if not os.path.isdir(self.root):
+            return
+        for name in sorted(os.listdir(self.root)):
+            if TENANT_NAME.match(name) and os.path.isdir(os.path.join(self.root, name)):
+                try:
+                    await self.engine(name)
+                except Exception as e:
+                    print(f"Помилка завантаження {name}: {e}")
+
+    def _evict(self):
+        """Вивантажує найдавніше використаних орендарів понад max_loaded
+
+        Орендарів, на яких ще чекають запити, не чіпає; якщо зайняті всі,
+        зайві вивантажаться під час наступного завантаження.
+        """
+        while len(self.loaded) > self.max_loaded:
+            tenant = next((t for t in self.loaded.values() if not t.pins), None)
+            if tenant is None:
+                return
+            del self.loaded[tenant.name]
+            self.unload(tenant)
+
+    def unload(self, tenant):
+        """Зберігає зміни орендаря і лишає в таймері лише його пробудження"""
+        engine = tenant.engine
+        engine.scheduler.stop()
+        engine.flush()
+        wake_at = engine.scheduler.next_wakeup()
+        tenant.engine = None
+        tenant.resume_from = wake_at
+        tenant.wake_event = self.clock.schedule_once(
+            lambda dt: self._wake(tenant.name), max(wake_at - time.time(), 0)
+        )
+
+    def _wake(self, name):
+        """Настав час нагадування вивантаженого орендаря: завантажує його"""
+        tenant = self.tenants[name]
+        tenant.wake_event = None
+        if tenant.engine is None:
+            asyncio.ensure_future(self.engine(name))
+
+    def _fired(self, name, reminders):
+        """Розсилає сповіщення підписникам орендаря і всіх орендарів"""
+        data = ''.join(
+            json.dumps(dict(reminder_record(r), tenant=name), ensure_ascii=False) + '\n'
+            for r in reminders
+        ).encode('utf-8')
+        for key in (name, None):
+            for writer in list(self.subscribers.get(key, ())):
+                # Повільний підписник не повинен накопичувати буфер без меж
+                if writer.is_closing() or writer.transport.get_write_buffer_size() > 1 << 20:
+                    self._unsubscribe(writer)
+                    writer.close()
+                else:
+                    writer.write(data)
+
+    def subscribe(self, writer, name=None):
+        if name is not None:
+            self.tenant(name)
+        self.subscribers.setdefault(name, set()).add(writer)
+
+    def _unsubscribe(self, writer):
+        for key, writers in list(self.subscribers.items()):
+            writers.discard(writer)
+            if not writers:
+                del self.subscribers[key]
+
+    async def handle(self, request, writer):
+        """Виконує один запит і повертає відповідь"""
+        op = request.get('op')
+        name = request.get('tenant')
+        if op == 'add':
+            # Спершу назва календаря, щоб помилка в ній не ховалась за помилкою запису
+            self.tenant(name)
+            data = dict(request.get('reminder') or {})
+            data['id'] = None
+            reminder = Reminder.from_dict(data)
+            if reminder.ts <= time.time():
+                raise ValueError('Час нагадування вже минув')
+            engine = await self.engine(name)
+            engine.add(reminder)
+            return {'ok': True, 'reminder': reminder.to_dict()}
+        if op == 'delete':
+            engine = await self.engine(name)
+            reminder = engine.store.get(request.get('id'))
+            if reminder is None:
+                raise ValueError('Нагадування не знайдено')
+            engine.remove(reminder)
+            return {'ok': True}
+        if op == 'month':
+            year, month = int(request['year']), int(request['month'])
+            engine = await self.engine(name)
+            start = datetime(year, month, 1)
+            end = datetime(year + month // 12, month % 12 + 1, 1)
+            reminders = engine.store.between(int(start.timestamp()), int(end.timestamp()))
+            return {'ok': True, 'reminders': [reminder_record(r) for r in reminders]}
+        if op == 'subscribe':
+            self.subscribe(writer, name)
+            return {'ok': True}
+        raise ValueError(f'Невідома операція: {op!r}')
+
+    async def serve_client(self, reader, writer):
+        """Обслуговує одне з'єднання: рядок запиту - рядок відповіді"""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError('Запит має бути об\'єктом JSON')
+                    response = await self.handle(request, writer)
+                except (ValueError, KeyError, TypeError, OverflowError, OSError) as e:
+                    response = {'ok': False, 'error': str(e)}
+                writer.write((json.dumps(response, ensure_ascii=False) + '\n').encode('utf-8'))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._unsubscribe(writer)
+            writer.close()
+
+    def close(self):
+        """Зберігає і ущільнює дані всіх завантажених орендарів"""
+        for tenant in list(self.loaded.values()):
+            tenant.engine.flush()
+        # Дочекатися черги запису, а ущільнення виконати вже в цьому потоці
+        self.writer.close()
+        for tenant in self.loaded.values():
+            tenant.engine.writer = None
+            tenant.engine.stop()
+        self.loaded.clear()
+
+
+def reminder_record(reminder):
+    """Запис нагадування у форматі reminders.json; повторення серії - з прапорцем"""
+    data = reminder.to_dict()
+    if reminder.repeat is None and getattr(reminder, 'series', None) is not None:
+        data['occurrence'] = True
+    return data
+
+
+async def serve(args):
+    loop = asyncio.get_running_loop()
+    clock = SharedClock(loop)
+    service = ReminderService(args.root, clock, args.storage, args.max_loaded)
+    if os.path.exists(args.socket):
+        os.remove(args.socket)
+    server = await asyncio.start_unix_server(service.serve_client, path=args.socket)
+    await service.discover()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, clock.stop)
+    try:
+        await clock.run()
+    finally:
+        server.close()
+        await server.wait_closed()
+        service.close()
+        profiler.flush()
+        if os.path.exists(args.socket):
+            os.remove(args.socket)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Служба нагадувань для багатьох календарів')
+    parser.add_argument('--root', default='tenants', help='тека з календарями орендарів')
+    parser.add_argument('--socket', default='calendars.sock', help='шлях unix-сокета API')
+    parser.add_argument('--storage', choices=sorted(STORAGE_MODES),
+                        default=os.environ.get('CALENDAR_STORAGE', 'journal'),
+                        help='режим збереження (як CALENDAR_STORAGE)')
+    parser.add_argument('--max-loaded', type=int, default=ReminderService.MAX_LOADED,
+                        help='скільки календарів тримати в пам\'яті')
+    args = parser.parse_args(argv)
+    if args.max_loaded < 1:
+        parser.error('--max-loaded має бути не менше 1')
+    asyncio.run(serve(args))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
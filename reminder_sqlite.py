@@ -0,0 +1,193 @@
+"""Сховище нагадувань у базі SQLite"""
+import json
+import sqlite3
+from datetime import datetime
+
+from reminder_recurrence import Recurrence
+from reminder_store import Reminder, ReminderStore, _EMPTY_MONTH
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS reminders (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    due INTEGER NOT NULL,
+    day INTEGER NOT NULL,
+    created INTEGER,
+    repeat TEXT
+);
+CREATE INDEX IF NOT EXISTS reminders_due ON reminders (due);
+CREATE INDEX IF NOT EXISTS reminders_day ON reminders (day);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER
+);
+'''
+
+_COLUMNS = 'id, title, due, created, repeat'
+
+
+def connect(path):
+    """Відкриває базу в режимі WAL і створює схему, якщо її немає
+
+    Базу може відкрити фоновий потік під час швидкого старту, а далі нею
+    користується головний потік, тому перевірку потоку вимкнено - доступ
+    у кожен момент має лише один потік.
+    """
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    # У режимі WAL NORMAL не втрачає цілісності, лише останню транзакцію при збої живлення
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def read_next_id(conn):
+    """Наступний id: збережений лічильник, але не менший за всі id у таблиці"""
+    row = conn.execute("SELECT value FROM meta WHERE key = 'next_id'").fetchone()
+    max_id = conn.execute('SELECT MAX(id) FROM reminders').fetchone()[0]
+    return max((row[0] if row else None) or 1, (max_id or 0) + 1)
+
+
+def write_next_id(conn, next_id):
+    """Записує лічильник id у поточну транзакцію"""
+    conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('next_id', ?)", (next_id,))
+
+
+def _day_key(ts):
+    """Дата моменту як ціле число рррммдд за місцевим часом"""
+    dt = datetime.fromtimestamp(ts)
+    return dt.year * 10000 + dt.month * 100 + dt.day
+
+
+def _row(reminder):
+    repeat = None if reminder.repeat is None else json.dumps(reminder.repeat.to_dict())
+    return (reminder.id, reminder.title, reminder.ts, _day_key(reminder.ts), reminder.created, repeat)
+
+
+def _reminder(row):
+    reminder_id, title, due, created, repeat = row
+    if repeat is not None:
+        repeat = Recurrence.from_dict(json.loads(repeat))
+    return Reminder(reminder_id, title, due, created, repeat)
+
+
+class SqliteReminderStore(ReminderStore):
+    """Сховище, у якому разові нагадування живуть у таблиці SQLite
+
+    У пам'яті тримаються лише серії, кількість записів і кеш лічильників
+    місяців; день, місяць і проміжок часу читаються запитами за індексами
+    day та due. Зміни виконуються у відкритій транзакції, яку фіксує
+    SqliteStorage.write - так пачка змін потрапляє на диск однією транзакцією.
+    """
+    def __init__(self, conn, next_id=1):
+        self._conn = conn
+        super(SqliteReminderStore, self).__init__(None, next_id)
+        for row in conn.execute(f'SELECT {_COLUMNS} FROM reminders WHERE repeat IS NOT NULL'):
+            series = _reminder(row)
+            self._series[series.id] = series
+
+    def _init_singles(self):
+        self._size = self._conn.execute(
+            'SELECT COUNT(*) FROM reminders WHERE repeat IS NULL'
+        ).fetchone()[0]
+        # (рік, місяць) -> кількість разових нагадувань по днях
+        self._month_cache = {}
+
+    def _invalidate(self, ts):
+        dt = datetime.fromtimestamp(ts)
+        self._month_cache.pop((dt.year, dt.month), None)
+        self._month_changed((dt.year, dt.month))
+
+    def _update_series(self, series):
+        self._conn.execute('INSERT OR REPLACE INTO reminders VALUES (?, ?, ?, ?, ?, ?)', _row(series))
+
+    def _drop_series(self, series):
+        self._conn.execute('DELETE FROM reminders WHERE id = ?', (series.id,))
+
+    def _count_singles(self):
+        return self._size
+
+    def _get_single(self, reminder_id):
+        if not isinstance(reminder_id, int):
+            return None
+        row = self._conn.execute(
+            f'SELECT {_COLUMNS} FROM reminders WHERE id = ? AND repeat IS NULL', (reminder_id,)
+        ).fetchone()
+        return None if row is None else _reminder(row)
+
+    def _insert_single(self, reminder):
+        self._insert_singles([reminder])
+
+    def _insert_singles(self, reminders):
+        if not reminders:
+            return
+        self._conn.executemany(
+            'INSERT OR REPLACE INTO reminders VALUES (?, ?, ?, ?, ?, ?)',
+            [_row(reminder) for reminder in reminders]
+        )
+        self._size += len(reminders)
+        for reminder in reminders:
+            self._invalidate(reminder.ts)
+
+    def _delete_single(self, reminder_id):
+        reminder = self._get_single(reminder_id)
+        if reminder is None:
+            return None
+        self._conn.execute('DELETE FROM reminders WHERE id = ?', (reminder_id,))
+        self._size -= 1
+        self._invalidate(reminder.ts)
+        return reminder
+
+    def _frozen_singles(self):
+        # Рядки читає власне з'єднання в потоці, що обходить результат, тож
+        # вони не накопичуються в пам'яті; видно зафіксовані зміни (SqliteStorage.write)
+        path = self._conn.execute('PRAGMA database_list').fetchone()[2]
+        if not path:
+            return self._singles_between(None, None)
+
+        def singles():
+            conn = sqlite3.connect(path)
+            try:
+                for row in conn.execute(f'SELECT {_COLUMNS} FROM reminders WHERE repeat IS NULL ORDER BY due, id'):
+                    yield _reminder(row)
+            finally:
+                conn.close()
+        return singles()
+
+    def _singles_on_date(self, date_obj):
+        day = date_obj.year * 10000 + date_obj.month * 100 + date_obj.day
+        rows = self._conn.execute(
+            f'SELECT {_COLUMNS} FROM reminders WHERE day = ? AND repeat IS NULL ORDER BY due, id',
+            (day,)
+        )
+        return [_reminder(row) for row in rows]
+
+    def _single_month_counts(self, year, month):
+        counts = self._month_cache.get((year, month))
+        if counts is None:
+            first = year * 10000 + month * 100
+            rows = self._conn.execute(
+                'SELECT day, COUNT(*) FROM reminders'
+                ' WHERE day > ? AND day < ? AND repeat IS NULL GROUP BY day',
+                (first, first + 32)
+            ).fetchall()
+            if rows:
+                counts = [0] * 32
+                for day, count in rows:
+                    counts[day - first] = count
+            else:
+                counts = _EMPTY_MONTH
+            self._month_cache[(year, month)] = counts
+        return counts
+
+    def _singles_between(self, start, end):
+        query = f'SELECT {_COLUMNS} FROM reminders WHERE repeat IS NULL'
+        params = []
+        if start is not None:
+            query += ' AND due >= ?'
+            params.append(start)
+        if end is not None:
+            query += ' AND due < ?'
+            params.append(end)
+        rows = self._conn.execute(query + ' ORDER BY due, id', params)
+        return [_reminder(row) for row in rows]
@@ -0,0 +1,499 @@
+"""Збереження нагадувань на диск"""
+import argparse
+import json
+import os
+import queue
+import sys
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from reminder_binary import BinarySnapshot, MmapReminderStore, encode_snapshot, snapshot_records
+from reminder_profile import count, timed
+from reminder_sqlite import SqliteReminderStore, connect, read_next_id, write_next_id
+from reminder_store import Reminder, ReminderStore, ReminderSummary, reminders_from_dicts
+
+
+@timed('storage.write')
+def atomic_write(path, text):
+    """Атомарно записує текст (або байти) у файл через тимчасовий файл і rename"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.tmp-', dir=directory)
+    try:
+        if isinstance(text, bytes):
+            f = os.fdopen(fd, 'wb')
+        else:
+            f = os.fdopen(fd, 'w', encoding='utf-8')
+        with f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+            count('bytes_written', f.tell())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+SNAPSHOT_VERSION = 2
+
+
+def read_snapshot(path):
+    """Читає знімок reminders.json
+
+    Повертає (нагадування, next_id, legacy). Старий формат - простий
+    список без лічильника id - позначається legacy=True.
+    """
+    if not os.path.exists(path):
+        return [], None, False
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    if not text.strip():
+        return [], None, False
+
+    data = json.loads(text)
+    if isinstance(data, list):
+        return data, None, True
+    return data.get('reminders', []), data.get('next_id'), False
+
+
+def snapshot_data(frozen):
+    """Знімок простими словниками з результату ReminderStore.freeze()
+
+    Обходить усі записи, тож для фонового запису викликається в потоці запису.
+    """
+    next_id, singles, series = frozen
+    reminders = [reminder.to_dict() for reminder in sorted(singles, key=lambda r: (r.ts, r.id))]
+    reminders.extend(series)
+    return {
+        'version': SNAPSHOT_VERSION,
+        'next_id': next_id,
+        'reminders': reminders,
+    }
+
+
+def dump_snapshot(data, indent=None):
+    """Серіалізує знімок з лічильником id"""
+    if indent is None:
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+    return json.dumps(data, ensure_ascii=False, indent=indent)
+
+
+def read_summary(path):
+    """Читає підсумок для швидкого старту; None, якщо його немає чи він пошкоджений"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return ReminderSummary.from_dict(json.load(f))
+    except (OSError, ValueError, TypeError, AttributeError):
+        return None
+
+
+def write_summary(path, summary):
+    """Атомарно записує підсумок для швидкого старту"""
+    atomic_write(path, json.dumps(summary.to_dict(), separators=(',', ':')))
+
+
+def _max_next_id(next_id, reminders):
+    """Наступний id: не менший за збережений лічильник і за всі відомі id"""
+    ids = [r.get('id') for r in reminders if isinstance(r.get('id'), int)]
+    return max([next_id or 1] + [i + 1 for i in ids])
+
+
+class FileStorage:
+    """Спільна частина сховищ, що тримають усі нагадування в пам'яті
+
+    prepare/prepare_compact знімають з сховища все потрібне для запису
+    й повертають задачу без аргументів, яку можна виконати в іншому
+    потоці (BackgroundWriter), або None, якщо писати нічого.
+    """
+    def write(self, changes, store):
+        """Записує зміни в поточному потоці"""
+        job = self.prepare(changes, store)
+        if job is not None:
+            job()
+
+    def compact(self, store):
+        """Ущільнює дані на диску в поточному потоці"""
+        job = self.prepare_compact(store)
+        if job is not None:
+            job()
+
+    def open_store(self):
+        """Завантажує дані і будує з них ReminderStore"""
+        store = ReminderStore(reminders_from_dicts(self.load()), self.next_id)
+        if store.renumbered or self.needs_migration:
+            # Одноразова міграція: виправлені дублікати id і лічильник
+            # next_id мають потрапити у знімок
+            self.compact(store)
+        return store
+
+
+class JsonStorage(FileStorage):
+    """Класичний режим: весь reminders.json перезаписується при кожній зміні"""
+    def __init__(self, path='reminders.json'):
+        self.path = path
+        self.next_id = None
+        self.needs_migration = False
+
+    def load(self):
+        """Завантажує всі нагадування"""
+        reminders, next_id, legacy = read_snapshot(self.path)
+        self.next_id = _max_next_id(next_id, reminders)
+        self.needs_migration = legacy
+        return reminders
+
+    def prepare(self, changes, store):
+        """Задача повного перезапису файлу поточним станом сховища"""
+        frozen = store.freeze()
+        return lambda: atomic_write(self.path, dump_snapshot(snapshot_data(frozen), indent=2))
+
+    def prepare_compact(self, store):
+        """Для повного перезапису ущільнення збігається зі звичайним збереженням"""
+        return self.prepare((), store)
+
+
+class JournalStorage(FileStorage):
+    """Режим журналу: зміни дописуються в кінець, знімок ущільнюється періодично
+
+    Кожна зміна - один рядок JSON у файлі журналу ('add' з повним записом
+    або 'del' з id). Під час завантаження журнал програється поверх знімка.
+    Програвання ідемпотентне, тож збій між записом знімка та очищенням
+    журналу не псує дані.
+    """
+    def __init__(self, path='reminders.json', journal_path=None, compact_every=1000):
+        self.path = path
+        self.journal_path = journal_path or path + '.journal'
+        self.compact_every = compact_every
+        self._journal_len = 0
+        self.next_id = None
+        self.needs_migration = False
+
+    def load(self):
+        """Завантажує знімок і програє журнал"""
+        reminders, next_id, legacy = read_snapshot(self.path)
+        self.needs_migration = legacy
+        self.next_id = _max_next_id(next_id, reminders)
+        if not os.path.exists(self.journal_path):
+            return reminders
+
+        positions = {r.get('id'): i for i, r in enumerate(reminders)}
+        for record in self._read_journal():
+            if record.get('op') == 'add':
+                reminder = record['r']
+                if isinstance(reminder.get('id'), int):
+                    # id видалених записів теж не можна видавати повторно
+                    self.next_id = max(self.next_id, reminder['id'] + 1)
+                pos = positions.get(reminder.get('id'))
+                if pos is None:
+                    positions[reminder.get('id')] = len(reminders)
+                    reminders.append(reminder)
+                else:
+                    reminders[pos] = reminder
+            elif record.get('op') == 'del':
+                pos = positions.pop(record.get('id'), None)
+                if pos is not None:
+                    reminders[pos] = None
+
+        return [r for r in reminders if r is not None]
+
+    def _read_journal(self):
+        """Читає записи журналу, рахуючи їх у _journal_len"""
+        self._journal_len = 0
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Обірваний останній рядок після аварійного завершення
+                    continue
+                self._journal_len += 1
+                yield record
+
+    def prepare(self, changes, store):
+        """Задача дописування змін у журнал або ущільнення, якщо він задовгий"""
+        if not changes:
+            return None
+        if self._journal_len + len(changes) > self.compact_every:
+            return self.prepare_compact(store)
+
+        records = [
+            {'op': 'add', 'r': value.to_dict()} if op == 'add' else {'op': 'del', 'id': value}
+            for op, value in changes
+        ]
+        self._journal_len += len(records)
+        return lambda: self._append(records)
+
+    @timed('storage.append')
+    def _append(self, records):
+        text = ''.join(json.dumps(r, ensure_ascii=False, separators=(',', ':')) + '\n' for r in records)
+        with open(self.journal_path, 'a+b') as f:
+            start = f.seek(0, os.SEEK_END)
+            if start:
+                # Обірваний останній рядок після аварійного завершення не
+                # повинен склеїтися з новим записом
+                f.seek(start - 1)
+                if f.read(1) != b'\n':
+                    text = '\n' + text
+            f.write(text.encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+            count('bytes_written', f.tell() - start)
+
+    def prepare_compact(self, store):
+        """Задача запису нового знімка й очищення журналу"""
+        frozen = store.freeze()
+        self._journal_len = 0
+        return lambda: self._replace(frozen)
+
+    def _replace(self, frozen):
+        atomic_write(self.path, dump_snapshot(snapshot_data(frozen)))
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+
+
+class SqliteStorage:
+    """Режим бази SQLite: у пам'ять завантажуються лише серії та лічильники
+
+    База лежить поруч із reminders.json з розширенням .db. Під час першого
+    запуску в цьому режимі нагадування переносяться з reminders.json та
+    його журналу; самі файли лишаються як резервна копія.
+    """
+    def __init__(self, path='reminders.json'):
+        self.path = path
+        self.db_path = os.path.splitext(path)[0] + '.db'
+        self.conn = None
+
+    def open_store(self):
+        """Відкриває базу і за потреби переносить у неї дані з JSON"""
+        is_new = not os.path.exists(self.db_path)
+        self.conn = connect(self.db_path)
+        store = SqliteReminderStore(self.conn, read_next_id(self.conn))
+        if is_new and (os.path.exists(self.path) or os.path.exists(self.path + '.journal')):
+            legacy = JournalStorage(self.path)
+            reminders = reminders_from_dicts(legacy.load())
+            store.next_id = max(store.next_id, legacy.next_id)
+            store.add_many(reminders)
+            self.write(store.drain_changes(), store)
+        return store
+
+    @timed('storage.commit')
+    def write(self, changes, store):
+        """Фіксує всі зміни сховища однією транзакцією"""
+        if not changes:
+            return
+        write_next_id(self.conn, store.next_id)
+        self.conn.commit()
+
+    def prepare(self, changes, store):
+        """Фіксує транзакцію одразу: зміни вже в з'єднанні, яким користується
+        головний потік, а коміт у режимі WAL не чекає fsync"""
+        self.write(changes, store)
+        return None
+
+    def compact(self, store):
+        """Переносить журнал WAL у файл бази"""
+        self.conn.commit()
+        self.conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+    def prepare_compact(self, store):
+        self.compact(store)
+        return None
+
+
+class BinaryStorage(JournalStorage):
+    """Режим двійкового знімка: reminders.bin читається через mmap, зміни - у журнал
+
+    Під час першого запуску в цьому режимі нагадування переносяться з
+    reminders.json та його журналу; самі файли лишаються як резервна копія.
+    Відображений знімок ніколи не змінюється на місці: новий записується
+    поруч і підміняє старий через rename, тож відкрите відображення лишається
+    дійсним.
+    """
+    def __init__(self, path='reminders.json', binary_path=None, compact_every=1000):
+        self.json_path = path
+        binary_path = binary_path or os.path.splitext(path)[0] + '.bin'
+        super(BinaryStorage, self).__init__(binary_path, binary_path + '.journal', compact_every)
+
+    def open_store(self):
+        """Відображає знімок у пам'ять і програє поверх нього журнал"""
+        if not os.path.exists(self.path):
+            legacy = JournalStorage(self.json_path)
+            store = ReminderStore(reminders_from_dicts(legacy.load()), legacy.next_id)
+            atomic_write(self.path, encode_snapshot(*snapshot_records(store.freeze())))
+
+        snapshot = BinarySnapshot(self.path)
+        store = MmapReminderStore(snapshot, snapshot.next_id)
+        for record in self._read_journal():
+            try:
+                if record.get('op') == 'add':
+                    reminder = Reminder.from_dict(record['r'])
+                    # Повторний запис з тим самим id - нова версія (наприклад, серії)
+                    store.remove(reminder.id)
+                    store.add(reminder)
+                elif record.get('op') == 'del':
+                    store.remove(record.get('id'))
+            except (KeyError, ValueError, TypeError, AttributeError, OverflowError, OSError):
+                continue
+        store.drain_changes()
+        return store
+
+    def prepare_compact(self, store):
+        """Задача запису нового двійкового знімка й очищення журналу"""
+        frozen = store.freeze()
+        self._journal_len = 0
+        return lambda: self._replace(frozen)
+
+    def _replace(self, frozen):
+        atomic_write(self.path, encode_snapshot(*snapshot_records(frozen)))
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+
+
+def json_to_binary(json_path, binary_path):
+    """Перетворює знімок reminders.json (і його журнал) на двійковий знімок"""
+    legacy = JournalStorage(json_path)
+    store = ReminderStore(reminders_from_dicts(legacy.load()), legacy.next_id)
+    atomic_write(binary_path, encode_snapshot(*snapshot_records(store.freeze())))
+    return len(store)
+
+
+def binary_to_json(binary_path, json_path):
+    """Перетворює двійковий знімок (і його журнал) на reminders.json"""
+    store = BinaryStorage(json_path, binary_path).open_store()
+    atomic_write(json_path, dump_snapshot(snapshot_data(store.freeze()), indent=2))
+    return len(store)
+
+
+class OwnerLock:
+    """Виключне володіння файлами нагадувань одним процесом
+
+    Застосунок і фонова служба над тими самими файлами писали б журнал і
+    знімок навперебій і дублювали б сповіщення, тому власником стає той,
+    хто першим захопив <path>.lock. Блокування знімає система, тож файл,
+    що лишився після аварійного завершення, не заважає.
+    """
+    def __init__(self, path='reminders.json'):
+        self.path = path + '.lock'
+        self._file = None
+
+    def acquire(self):
+        """Захоплює блокування; False, якщо файли вже відкрито іншим процесом"""
+        f = open(self.path, 'a+', encoding='utf-8')
+        try:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            f.close()
+            return False
+        f.truncate(0)
+        f.write(str(os.getpid()))
+        f.flush()
+        self._file = f
+        return True
+
+    def owner(self):
+        """pid процесу, що тримає блокування, або None"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return None
+
+    def release(self):
+        """Звільняє блокування"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class BackgroundWriter:
+    """Потік запису на диск з обмеженою чергою задач
+
+    Задачі виконуються по одній у порядку надходження. Коли черга
+    заповнена, submit чекає - так повільний диск не накопичує пам'ять.
+    on_done() і on_error(exception) викликаються в потоці запису.
+    """
+    def __init__(self, on_done=None, on_error=None, maxsize=8):
+        self.on_done = on_done
+        self.on_error = on_error
+        self._queue = queue.Queue(maxsize)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, job):
+        """Ставить задачу в чергу"""
+        self._queue.put(job)
+
+    def wait(self):
+        """Чекає, доки виконаються всі поставлені задачі"""
+        self._queue.join()
+
+    def close(self):
+        """Дописує всі задачі з черги і зупиняє потік"""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            try:
+                if job is None:
+                    return
+                job()
+            except Exception as e:
+                if self.on_error is not None:
+                    self.on_error(e)
+            else:
+                if self.on_done is not None:
+                    self.on_done()
+            finally:
+                self._queue.task_done()
+
+
+STORAGE_MODES = {
+    'json': JsonStorage,
+    'journal': JournalStorage,
+    'sqlite': SqliteStorage,
+    'binary': BinaryStorage,
+}
+
+
+def open_storage(mode='journal', path='reminders.json'):
+    """Створює сховище на диску за назвою режиму"""
+    try:
+        return STORAGE_MODES[mode](path)
+    except KeyError:
+        raise ValueError(f'Невідомий режим збереження: {mode}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Перетворення знімка нагадувань між JSON і двійковим форматом (.bin)'
+    )
+    parser.add_argument('source', help='reminders.json або reminders.bin')
+    parser.add_argument('target', help='файл результату')
+    args = parser.parse_args(argv)
+
+    if os.path.splitext(args.source)[1].lower() == '.bin':
+        count = binary_to_json(args.source, args.target)
+    else:
+        count = json_to_binary(args.source, args.target)
+    print(f'Перетворено нагадувань: {count}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,529 @@
+"""Індексоване сховище нагадувань"""
+from bisect import bisect_left
+from datetime import datetime, timedelta
+
+from reminder_recurrence import Recurrence
+
+
+class Reminder:
+    """Компактний запис нагадування
+
+    Момент нагадування зберігається одним цілим числом - секундами епохи
+    за місцевим часом; рядки дати і часу для відображення обчислюються на
+    вимогу. to_dict/from_dict відповідають схемі запису в reminders.json.
+    Для серії ts - момент першого повторення, а repeat - правило Recurrence.
+    """
+    __slots__ = ('id', 'title', 'ts', 'created', 'repeat')
+
+    def __init__(self, id, title, ts, created=None, repeat=None):
+        self.id = id
+        self.title = title
+        self.ts = ts
+        self.created = created
+        self.repeat = repeat
+
+    def __repr__(self):
+        return f'Reminder(id={self.id!r}, title={self.title!r}, ts={self.ts!r})'
+
+    @property
+    def dt(self):
+        """Момент нагадування як datetime"""
+        return datetime.fromtimestamp(self.ts)
+
+    @property
+    def date(self):
+        """Дата у форматі '%d.%m.%Y'"""
+        return self.dt.strftime('%d.%m.%Y')
+
+    @property
+    def time(self):
+        """Час у форматі 'ГГ:ХХ'"""
+        return self.dt.strftime('%H:%M')
+
+    @classmethod
+    def from_dict(cls, data):
+        """Створює запис зі словника формату reminders.json; ValueError, якщо дата некоректна"""
+        try:
+            dt = datetime.fromisoformat(data['datetime'])
+        except (KeyError, TypeError, ValueError):
+            try:
+                dt = datetime.strptime(f"{data['date']} {data['time']}", '%d.%m.%Y %H:%M')
+            except (KeyError, TypeError) as e:
+                raise ValueError(f'Нагадування без дати: {e}')
+
+        try:
+            created = int(datetime.strptime(data['created'], '%Y-%m-%d %H:%M:%S').timestamp())
+        except (KeyError, TypeError, ValueError):
+            created = None
+
+        repeat = data.get('repeat')
+        if repeat is not None:
+            try:
+                repeat = Recurrence.from_dict(repeat)
+            except (KeyError, TypeError) as e:
+                raise ValueError(f'Некоректне правило повторення: {e}')
+
+        return cls(data.get('id'), data.get('title', ''), int(dt.timestamp()), created, repeat)
+
+    def to_dict(self):
+        """Повертає словник у форматі reminders.json"""
+        dt = self.dt
+        data = {
+            'id': self.id,
+            'title': self.title,
+            'date': f'{dt.day:02d}.{dt.month:02d}.{dt.year:04d}',
+            'time': f'{dt.hour:02d}:{dt.minute:02d}',
+            'datetime': dt.isoformat(),
+        }
+        if self.created is not None:
+            data['created'] = datetime.fromtimestamp(self.created).strftime('%Y-%m-%d %H:%M:%S')
+        if self.repeat is not None:
+            data['repeat'] = self.repeat.to_dict()
+        return data
+
+
+class Occurrence(Reminder):
+    """Одне повторення серії; id і текст збігаються із серією"""
+    __slots__ = ('series',)
+
+    def __init__(self, series, ts):
+        super(Occurrence, self).__init__(series.id, series.title, ts, series.created)
+        self.series = series
+
+
+def reminders_from_dicts(items):
+    """Перетворює словники з файлу на записи, пропускаючи пошкоджені"""
+    reminders = []
+    for data in items:
+        try:
+            reminders.append(Reminder.from_dict(data))
+        except (ValueError, TypeError, AttributeError, OverflowError, OSError):
+            continue
+    return reminders
+
+
+_EMPTY_MONTH = (0,) * 32
+
+
+def iter_frozen(frozen):
+    """Нагадування зі знімка ReminderStore.freeze(): разові, потім серії"""
+    yield from frozen[1]
+    for data in frozen[2]:
+        yield Reminder.from_dict(data)
+
+
+class ReminderStore:
+    """Сховище нагадувань з індексами за id, датою та часом
+
+    Пошук за днем і видалення виконуються за O(1), вибірка за діапазоном
+    часу - за O(log n) через бінарний пошук по відсортованій шкалі.
+
+    id видаються монотонним лічильником next_id, який зберігається разом
+    із даними, тож id видаленого нагадування ніколи не повторюється.
+
+    Серії повторюваних нагадувань завжди тримаються в пам'яті, а разові
+    нагадування - через методи _*_single(s), які інші сховища (наприклад,
+    SQLite) можуть перевизначити.
+    """
+    def __init__(self, reminders=None, next_id=1):
+        self.next_id = next_id
+        # Серії повторюваних нагадувань: id -> Reminder з repeat
+        self._series = {}
+        # Кеш лічильників місяців з урахуванням серій
+        self._series_counts = {}
+        # Номери змін: (рік, місяць) -> зміни разових нагадувань місяця,
+        # _series_revision - зміни будь-якої серії (зачіпають усі місяці)
+        self._month_revisions = {}
+        self._series_revision = 0
+        # Зміни, ще не передані на збереження: ('add', reminder) або ('del', id)
+        self._changes = []
+        self.renumbered = 0
+        self._init_singles()
+
+        if reminders:
+            self.add_many(reminders)
+            self._changes = []
+
+    def __len__(self):
+        return self._count_singles() + len(self._series)
+
+    def __iter__(self):
+        """Ітерує записи: разові нагадування в порядку часу, потім серії"""
+        yield from self._singles_between(None, None)
+        yield from self._series.values()
+
+    def __contains__(self, reminder_id):
+        return self.get(reminder_id) is not None
+
+    def get(self, reminder_id):
+        """Повертає нагадування за id"""
+        series = self._series.get(reminder_id)
+        if series is not None:
+            return series
+        return self._get_single(reminder_id)
+
+    def due_time(self, reminder_id):
+        """Повертає момент нагадування (секунди епохи) або None"""
+        reminder = self.get(reminder_id)
+        return None if reminder is None else reminder.ts
+
+    def occurrence_at(self, reminder_id, ts):
+        """Повертає нагадування чи повторення серії з id на момент ts або None"""
+        reminder = self.get(reminder_id)
+        if reminder is None:
+            return None
+        if reminder.repeat is None:
+            return reminder if reminder.ts == ts else None
+        if reminder.repeat.contains(reminder.ts, ts):
+            return Occurrence(reminder, ts)
+        return None
+
+    def occurrences(self, reminder, start=None, end=None):
+        """Повторення серії (або саме разове нагадування) у проміжку [start, end)"""
+        if reminder.repeat is None:
+            if (start is None or reminder.ts >= start) and (end is None or reminder.ts < end):
+                yield reminder
+            return
+        for ts in reminder.repeat.between(reminder.ts, start, end):
+            yield Occurrence(reminder, ts)
+
+    def series(self):
+        """Усі серії повторюваних нагадувань"""
+        return list(self._series.values())
+
+    def skip_occurrence(self, series_id, ts):
+        """Видаляє одне повторення серії, додаючи виняток"""
+        series = self._series.get(series_id)
+        if series is None:
+            return
+        series.repeat.exdates.add(ts)
+        self._series_changed()
+        self._update_series(series)
+        self._changes.append(('add', series))
+
+    def expired_series(self, moment):
+        """Серії, у яких не лишилось повторень, не раніших за moment"""
+        return [
+            series for series in self._series.values()
+            if series.repeat.next_after(series.ts, moment) is None
+        ]
+
+    def allocate_id(self):
+        """Видає новий унікальний id"""
+        reminder_id = self.next_id
+        self.next_id += 1
+        return reminder_id
+
+    def add(self, reminder):
+        """Додає нагадування до всіх індексів"""
+        self._assign_id(reminder)
+        self._changes.append(('add', reminder))
+        if reminder.repeat is not None:
+            self._add_series(reminder)
+        else:
+            self._insert_single(reminder)
+        return reminder
+
+    def add_many(self, reminders):
+        """Додає кілька нагадувань однією пачкою"""
+        singles = []
+        # id пачки, ще не доданих до індексів
+        pending = set()
+        for reminder in reminders:
+            self._assign_id(reminder, pending)
+            pending.add(reminder.id)
+            self._changes.append(('add', reminder))
+            if reminder.repeat is not None:
+                self._add_series(reminder)
+            else:
+                singles.append(reminder)
+        self._insert_singles(singles)
+
+    def remove(self, reminder_id):
+        """Видаляє нагадування за id і повертає його (або None)"""
+        reminder = self._series.pop(reminder_id, None)
+        if reminder is not None:
+            self._series_changed()
+            self._drop_series(reminder)
+        else:
+            reminder = self._delete_single(reminder_id)
+            if reminder is None:
+                return None
+        self._changes.append(('del', reminder_id))
+        return reminder
+
+    def on_date(self, date_obj):
+        """Повертає нагадування і повторення серій на день, відсортовані за часом"""
+        result = self._singles_on_date(date_obj)
+        if self._series:
+            start = datetime(date_obj.year, date_obj.month, date_obj.day)
+            result.extend(self._series_between(
+                int(start.timestamp()), int((start + timedelta(days=1)).timestamp())
+            ))
+        result.sort(key=lambda x: x.ts)
+        return result
+
+    def has_date(self, date_obj):
+        """Чи є нагадування на вказаний день"""
+        return self.count_on(date_obj) > 0
+
+    def count_on(self, date_obj):
+        """Кількість нагадувань на дату за індексом щільності"""
+        return self.month_counts(date_obj.year, date_obj.month)[date_obj.day]
+
+    def month_counts(self, year, month):
+        """Кількість нагадувань по днях місяця: 32 елементи, [0] не використовується
+
+        Повторення серій розгортаються лише для запитаного місяця і кешуються
+        до наступної зміни в цьому місяці чи в будь-якій серії.
+        """
+        base = self._single_month_counts(year, month)
+        if not self._series:
+            return base
+
+        counts = self._series_counts.get((year, month))
+        if counts is None:
+            counts = list(base)
+            start = datetime(year, month, 1)
+            end = datetime(year + month // 12, month % 12 + 1, 1)
+            for occurrence in self._series_between(int(start.timestamp()), int(end.timestamp())):
+                counts[occurrence.dt.day] += 1
+            self._series_counts[(year, month)] = counts
+        return counts
+
+    def month_revision(self, year, month):
+        """Номер зміни місяця: інший, ніж раніше, якщо лічильники чи нагадування місяця могли змінитися"""
+        return (self._series_revision, self._month_revisions.get((year, month), 0))
+
+    def between(self, start=None, end=None, include_series=True):
+        """Нагадування з моментом у проміжку [start, end) у порядку часу
+
+        Повторення серій додаються лише для обмеженого проміжку (end задано).
+        """
+        singles = self._singles_between(start, end)
+        if not include_series or end is None or not self._series:
+            return singles
+        result = singles + self._series_between(start, end)
+        result.sort(key=lambda x: x.ts)
+        return result
+
+    def drain_changes(self):
+        """Повертає і скидає накопичені зміни для збереження"""
+        changes, self._changes = self._changes, []
+        return changes
+
+    def freeze(self):
+        """Незмінний знімок для запису в іншому потоці: (next_id, разові, серії)
+
+        Разові нагадування не змінюються після додавання, тож знімаються лише
+        посилання на них; серії (skip_occurrence змінює їх на місці)
+        копіюються словниками. Словники разових будує вже потік запису.
+        """
+        return self.next_id, self._frozen_singles(), [series.to_dict() for series in self._series.values()]
+
+    def _assign_id(self, reminder, pending=()):
+        """Видає id новому запису або виправляє id, що повторюється"""
+        reminder_id = reminder.id
+        if reminder_id is None:
+            reminder.id = self.allocate_id()
+        elif (not isinstance(reminder_id, int) or reminder_id in pending
+                or self.get(reminder_id) is not None):
+            # Старі файли могли містити однакові id (їх видавали як
+            # len(reminders) + 1) - такі записи отримують новий id
+            reminder.id = self.allocate_id()
+            self.renumbered += 1
+        elif reminder_id >= self.next_id:
+            self.next_id = reminder_id + 1
+
+    def _add_series(self, series):
+        self._series[series.id] = series
+        self._series_changed()
+        self._update_series(series)
+
+    def _month_changed(self, month_key):
+        """Позначає зміну разових нагадувань місяця (рік, місяць)"""
+        self._series_counts.pop(month_key, None)
+        self._month_revisions[month_key] = self._month_revisions.get(month_key, 0) + 1
+
+    def _series_changed(self):
+        """Позначає зміну серії: повторення могли зсунутися в будь-якому місяці"""
+        self._series_counts.clear()
+        self._series_revision += 1
+
+    def _update_series(self, series):
+        """Викликається після додавання чи зміни серії; для сховищ з власним диском"""
+
+    def _drop_series(self, series):
+        """Викликається після видалення серії; для сховищ з власним диском"""
+
+    def _series_between(self, start, end):
+        """Повторення всіх серій у проміжку [start, end)"""
+        result = []
+        for series in self._series.values():
+            result.extend(self.occurrences(series, start, end))
+        return result
+
+    # Разові нагадування в пам'яті
+
+    def _init_singles(self):
+        self._by_id = {}
+        self._by_date = {}
+        # Відсортовані пари (ts, id); видалені записи лишаються тут
+        # до чергового ущільнення і відкидаються під час читання
+        self._timeline = []
+        self._stale = 0
+        # (рік, місяць) -> кількість нагадувань по днях, індекс - число місяця
+        self._month_counts = {}
+
+    def _count_singles(self):
+        return len(self._by_id)
+
+    def _get_single(self, reminder_id):
+        return self._by_id.get(reminder_id)
+
+    def _index_single(self, reminder):
+        """Додає до індексів за id, датою і щільністю; повертає запис шкали"""
+        dt = reminder.dt
+        self._by_id[reminder.id] = reminder
+        self._by_date.setdefault(dt.date(), {})[reminder.id] = reminder
+        self._count(dt, 1)
+        return (reminder.ts, reminder.id)
+
+    def _insert_single(self, reminder):
+        entry = self._index_single(reminder)
+        i = bisect_left(self._timeline, entry)
+        if i < len(self._timeline) and self._timeline[i] == entry:
+            # Запис лишився від видаленого нагадування з тим самим id
+            self._stale -= 1
+        else:
+            self._timeline.insert(i, entry)
+
+    def _insert_singles(self, reminders):
+        """Шкала сортується один раз на всю пачку"""
+        if not reminders:
+            return
+        if self._stale:
+            self._compact()
+        self._timeline.extend(self._index_single(reminder) for reminder in reminders)
+        self._timeline.sort()
+
+    def _delete_single(self, reminder_id):
+        reminder = self._by_id.pop(reminder_id, None)
+        if reminder is None:
+            return None
+
+        dt = reminder.dt
+        day = self._by_date.get(dt.date())
+        if day is not None:
+            day.pop(reminder_id, None)
+            if not day:
+                del self._by_date[dt.date()]
+        self._count(dt, -1)
+
+        self._stale += 1
+        if self._stale > 64 and self._stale > len(self._timeline) // 2:
+            self._compact()
+        return reminder
+
+    def _frozen_singles(self):
+        # Копія словника виконується в C, без обходу записів у Python
+        return list(self._by_id.values())
+
+    def _singles_on_date(self, date_obj):
+        day = self._by_date.get(date_obj)
+        return list(day.values()) if day else []
+
+    def _single_month_counts(self, year, month):
+        return self._month_counts.get((year, month), _EMPTY_MONTH)
+
+    def _singles_between(self, start, end):
+        """Разові нагадування у проміжку [start, end) за відсортованою шкалою"""
+        timeline = self._timeline
+        lo = 0 if start is None else bisect_left(timeline, (start,))
+        hi = len(timeline) if end is None else bisect_left(timeline, (end,), lo)
+
+        result = []
+        by_id = self._by_id
+        for i in range(lo, hi):
+            ts, reminder_id = timeline[i]
+            reminder = by_id.get(reminder_id)
+            if reminder is not None and reminder.ts == ts:
+                result.append(reminder)
+        return result
+
+    def _count(self, dt, delta):
+        """Оновлює індекс щільності для дня нагадування"""
+        month_key = (dt.year, dt.month)
+        counts = self._month_counts.get(month_key)
+        if counts is None:
+            counts = self._month_counts[month_key] = [0] * 32
+        counts[dt.day] += delta
+        if delta < 0 and not any(counts):
+            del self._month_counts[month_key]
+        self._month_changed(month_key)
+
+    def _compact(self):
+        """Прибирає зі шкали записи видалених нагадувань"""
+        by_id = self._by_id
+        self._timeline = [
+            (ts, i) for ts, i in self._timeline
+            if i in by_id and by_id[i].ts == ts
+        ]
+        self._stale = 0
+
+
+class ReminderSummary:
+    """Стислий підсумок сховища для першого кадру до повного завантаження
+
+    Містить загальну кількість нагадувань і лічильники по днях для кількох
+    місяців навколо поточного; відповідає на ті ж запити, що й ReminderStore
+    під час малювання календаря.
+    """
+    def __init__(self, total=0, months=None):
+        self.total = total
+        # (рік, місяць) -> кількість нагадувань по днях
+        self.months = months or {}
+
+    def __len__(self):
+        return self.total
+
+    def month_counts(self, year, month):
+        """Кількість нагадувань по днях місяця або нулі, якщо місяця немає в підсумку"""
+        return self.months.get((year, month), _EMPTY_MONTH)
+
+    def count_on(self, date_obj):
+        """Кількість нагадувань на дату"""
+        return self.month_counts(date_obj.year, date_obj.month)[date_obj.day]
+
+    def month_revision(self, year, month):
+        """Підсумок не змінюється"""
+        return 0
+
+    @classmethod
+    def from_store(cls, store, around, span=1):
+        """Підсумок для місяця дати around і span місяців до та після нього"""
+        months = {}
+        for offset in range(-span, span + 1):
+            index = around.year * 12 + around.month - 1 + offset
+            year, month = index // 12, index % 12 + 1
+            counts = store.month_counts(year, month)
+            if any(counts):
+                months[(year, month)] = list(counts)
+        return cls(len(store), months)
+
+    def to_dict(self):
+        """Повертає словник для збереження"""
+        return {
+            'total': self.total,
+            'months': {f'{y:04d}-{m:02d}': counts for (y, m), counts in self.months.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Створює підсумок зі збереженого словника"""
+        months = {}
+        for key, counts in data.get('months', {}).items():
+            year, month = key.split('-')
+            if len(counts) == 32:
+                months[(int(year), int(month))] = counts
+        return cls(data.get('total', 0), months)